@@ -1,19 +1,63 @@
-from redlock import Redlock
 import json
-from kafka import KafkaProducer, KafkaConsumer
-from logging_config import logger
 import threading
+import time
+from logging_config import logger
 
 class AdvancedClusterManager:
-    def __init__(self, brokers=["kafka:9092"], topic="engine_state", group_id="engine_cluster"):
+    """
+    Kafka-backed state broadcast between engine nodes.
+
+    Producer and consumer are created lazily: the producer on the first
+    broadcast, in a background thread so an unreachable broker never blocks
+    the engine loop (states fall back to the log until it is connected), the
+    consumer when listening starts.
+    """
+
+    def __init__(self, brokers=["kafka:9092"], topic="engine_state", group_id="engine_cluster", retry_interval=30.0):
         self.brokers = brokers
         self.topic = topic
         self.group_id = group_id
+        self.retry_interval = retry_interval
+        self.producer = None
+        self.consumer = None
+        self._connecting = False
+        self._last_attempt = None
+        self._lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    def connect(self):
+        """Create the Kafka producer (blocking). Returns True when connected."""
         try:
-            self.producer = KafkaProducer(
+            from kafka import KafkaProducer
+            producer = KafkaProducer(
                 bootstrap_servers=self.brokers,
                 value_serializer=lambda v: json.dumps(v).encode('utf-8')
             )
+            logger.info("KafkaProducer inizializzato.")
+        except Exception as e:
+            logger.error("Errore nell'inizializzazione di Kafka: %s", e)
+            producer = None
+        with self._lock:
+            self.producer = producer
+            self._connecting = False
+        return producer is not None
+
+    def ensure_producer(self):
+        if self.producer is not None:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            if self._connecting or (self._last_attempt is not None and now - self._last_attempt < self.retry_interval):
+                return False
+            self._connecting = True
+            self._last_attempt = now
+        threading.Thread(target=self.connect, name="kafka-connect", daemon=True).start()
+        return False
+
+    def _create_consumer(self):
+        try:
+            from kafka import KafkaConsumer
             self.consumer = KafkaConsumer(
                 self.topic,
                 bootstrap_servers=self.brokers,
@@ -22,16 +66,13 @@ class AdvancedClusterManager:
                 group_id=self.group_id,
                 value_deserializer=lambda m: json.loads(m.decode('utf-8'))
             )
-            logger.info("KafkaProducer e KafkaConsumer inizializzati.")
+            logger.info("KafkaConsumer inizializzato.")
         except Exception as e:
             logger.error("Errore nell'inizializzazione di Kafka: %s", e)
-            self.producer = None
             self.consumer = None
-        self.running = False
-        self.thread = None
 
     def broadcast_state(self, state):
-        if self.producer:
+        if self.ensure_producer():
             try:
                 self.producer.send(self.topic, state)
                 self.producer.flush()
@@ -42,6 +83,8 @@ class AdvancedClusterManager:
             logger.info("Fallback cluster: stato: %s", state)
 
     def listen_cluster(self, callback):
+        if self.consumer is None:
+            self._create_consumer()
         if not self.consumer:
             logger.error("KafkaConsumer non inizializzato.")
             return
@@ -65,12 +108,23 @@ class AdvancedClusterManager:
             self.thread.join()
 
 advanced_cluster_manager = AdvancedClusterManager()
+
+def broadcast_state(state):
+    advanced_cluster_manager.broadcast_state(state)
+
 # Leader election stub using Redis lock
-from redis import Redis
-redis_client = Redis()
+_redis_client = None
+
+def get_redis_client():
+    """Redis client for the leader lock, created on first use."""
+    global _redis_client
+    if _redis_client is None:
+        from redis import Redis
+        _redis_client = Redis()
+    return _redis_client
 
 def elect_leader():
-    lock = redis_client.lock("engine_leader", timeout=60)
+    lock = get_redis_client().lock("engine_leader", timeout=60)
     if lock.acquire(blocking=False):
         return True
     return False
@@ -1,5 +1,5 @@
 from flask_jwt_extended import get_jwt_identity
-from app.db_manager import DBManager
+from app.db_manager import get_db_manager
 
 # RBAC stub
 from functools import wraps
@@ -138,7 +138,7 @@ def get_config():
 @require_permission('config:write')
 def update_config():
     user = get_jwt_identity()
-    db = DBManager()
+    db = get_db_manager()
     try:
         new_config = ConfigUpdateModel(**request.json)
     except ValidationError as e:
@@ -172,8 +172,8 @@ api.register_blueprint(blp)
 
 @app.route('/api/audit/<int:record_id>', methods=['GET'])
 def get_audit(record_id):
-    from app.db_manager import DBManager, Audit
-    session = DBManager().Session()
+    from app.db_manager import Audit
+    session = get_db_manager().Session()
     entries = session.query(Audit).filter(Audit.record_id==record_id).all()
     return jsonify([{'action':e.action,'user':e.user,'old_value':e.old_value,'new_value':e.new_value,'timestamp':e.timestamp.isoformat()} for e in entries]), 200
 
@@ -186,9 +186,8 @@ def swagger_json():
 
 @app.route('/health', methods=['GET'])
 def health():
-    from app.db_manager import DBManager
     try:
-        DBManager().health_check()
+        get_db_manager().health_check()
         return jsonify({'status': 'ok'}), 200
     except Exception as e:
         return jsonify({'status': 'error', 'detail': str(e)}), 500
@@ -273,13 +272,41 @@ from flask import render_template
 @app.route('/metrics/ui')
 def metrics_ui():
     return render_template('metrics_ui.html')
+
+@app.route('/api/engines/<engine_id>/trace', methods=['GET'])
+@jwt_required()
+@require_api_key
+def get_engine_trace(engine_id):
+    """Last cycles of an engine as Chrome trace / Perfetto JSON."""
+    from engine_manager import engine_manager
+    cycles = request.args.get('cycles', type=int)
+    try:
+        return jsonify(engine_manager.get_trace(engine_id, cycles)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 404
+
+@app.route('/api/startup', methods=['GET'])
+@jwt_required()
+@require_api_key
+def get_startup_profile():
+    """Import/init time per subsystem and time to the first completed cycle."""
+    from startup import startup_profile
+    return jsonify(startup_profile.report()), 200
+
+@app.route('/api/tags', methods=['GET'])
+@jwt_required()
+@require_api_key
+def get_tags():
+    """Live DataPool tags (shared across processes when ``shared_data_pool`` is configured)."""
+    from data_pool import data_pool
+    return jsonify(data_pool.get_all_variables()), 200
 @app.route('/api/audit/full/<int:record_id>')
     # Pagination query parameters
     limit = int(request.args.get('limit', 100))
     offset = int(request.args.get('offset', 0))
     entries = session.query(Audit).filter(Audit.record_id==record_id).limit(limit).offset(offset).all()
 def get_audit_full(record_id):
-    from app.db_manager import DBManager, Audit
-    session = DBManager().Session()
+    from app.db_manager import Audit
+    session = get_db_manager().Session()
     entries = session.query(Audit).filter(Audit.record_id==record_id).all()
     return jsonify([{'old_json':e.old_json,'new_json':e.new_json} for e in entries]),200
\ No newline at end of file
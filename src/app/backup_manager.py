@@ -43,6 +43,8 @@ class BackupManager:
         """Loop interno per eseguire i backup a intervalli regolari."""
             # TODO: compute checksum and implement retention policy
             # checksum = hashlib.md5(open(backup_path,'rb').read()).hexdigest()
+        from cpu_placement import pin_housekeeping_thread
+        pin_housekeeping_thread("backup-manager")
         while self.running:
             timestamp = int(time.time())
             backup_file = f"{self.backup_folder}/states_{timestamp}.db"
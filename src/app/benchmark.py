@@ -0,0 +1,226 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from logging_config import logger
+from engine import FastAsyncEngine
+from cycle_scheduler import DeadlineScheduler
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# metric -> True when higher is better
+TRACKED_METRICS = {
+    "cycle_time_p50": False,
+    "cycle_time_p99": False,
+    "jitter_p99": False,
+    "cycles_per_second": True,
+    "blocks_per_second": True,
+    "db_writes_per_second": True,
+    "max_rss_mb": False,
+}
+
+SYNTHETIC_LOGIC = '''\
+from io_manager import ConfigurableMockDriver
+
+devices = [ConfigurableMockDriver(latency={latency!r}, error_rate={error_rate!r}, seed={seed} + i, value=i)
+           for i in range({devices})]
+
+class SyntheticBlock:
+    """Reads one mock device (async) or does a bit of arithmetic (sync); state changes every run."""
+    executions = 0
+
+    def __init__(self, index, device=None):
+        self.index = index
+        self.device = device
+        self.state = {{"count": 0, "value": 0.0, "errors": 0}}
+
+    def _step(self, sample):
+        SyntheticBlock.executions += 1
+        self.state["count"] += 1
+        self.state["value"] = (self.state["value"] * 0.9 + sample) % 1000.0
+
+    def get_state(self):
+        return dict(self.state)
+
+    def set_state(self, state):
+        self.state.update(state)
+
+class IOBlock(SyntheticBlock):
+    async def execute(self):
+        try:
+            sample = await self.device.read()
+        except Exception:
+            self.state["errors"] += 1
+            sample = 0
+        self._step(sample)
+
+class ComputeBlock(SyntheticBlock):
+    def execute(self):
+        acc = 0
+        for i in range({work}):
+            acc += (i * self.index) % 7
+        self._step(acc)
+
+logic_blocks = {{}}
+for i in range({blocks}):
+    if i < len(devices):
+        logic_blocks[f"io_{{i}}"] = IOBlock(i, devices[i])
+    else:
+        logic_blocks[f"compute_{{i}}"] = ComputeBlock(i)
+'''
+
+def percentile(samples, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not samples:
+        return 0.0
+    return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+def write_synthetic_logic(path, blocks, devices, latency=0.0005, error_rate=0.0, seed=0, work=50):
+    with open(path, "w") as f:
+        f.write(SYNTHETIC_LOGIC.format(blocks=blocks, devices=min(devices, blocks), latency=latency,
+                                       error_rate=error_rate, seed=seed, work=work))
+    return path
+
+def max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes elsewhere
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+class CycleSampler:
+    """Wraps ``engine.run_cycle`` to record the duration and start time of every cycle."""
+
+    def __init__(self, engine):
+        self.durations = []
+        self.starts = []
+        self._run_cycle = engine.run_cycle
+        engine.run_cycle = self._timed_cycle
+
+    async def _timed_cycle(self):
+        start = time.perf_counter()
+        self.starts.append(start)
+        try:
+            await self._run_cycle()
+        finally:
+            self.durations.append(time.perf_counter() - start)
+
+    def jitter(self, cycle_time):
+        """Absolute deviation of each cycle period from the nominal cycle time."""
+        return [abs(b - a - cycle_time) for a, b in zip(self.starts, self.starts[1:])]
+
+async def run_benchmark(blocks=100, devices=10, duration=10.0, cycle_time=0.005, latency=0.0005,
+                        error_rate=0.0, seed=0, scheduler="deadline", workdir=None):
+    """Run a synthetic engine for ``duration`` seconds and return the measured results."""
+    workdir = workdir or tempfile.mkdtemp(prefix="vengine_bench_")
+    logic_path = write_synthetic_logic(os.path.join(workdir, "bench_logic.py"), blocks, devices,
+                                       latency=latency, error_rate=error_rate, seed=seed)
+    engine_scheduler = DeadlineScheduler(cycle_time, engine_id="bench") if scheduler == "deadline" else None
+    # an explicit URL: a configured shared db_url would otherwise take precedence over db_path
+    db_path = os.path.join(workdir, "bench.db")
+    engine = FastAsyncEngine(logic_path, cycle_time=cycle_time, db_path=db_path, db_url=f"sqlite:///{db_path}",
+                             scheduler=engine_scheduler, engine_id="bench")
+    sampler = CycleSampler(engine)
+    logger.info("Benchmark avviato: %d blocchi, %d dispositivi, %.1fs.", blocks, devices, duration)
+    task = asyncio.create_task(engine.run())
+    await asyncio.sleep(duration)
+    end = time.perf_counter()
+    await engine.stop()
+    await task
+    wall = end - sampler.starts[0] if sampler.starts else duration
+    # the synthetic blocks share one class-level execution counter
+    sample_block = next(iter(engine.blocks.values()), None)
+    executions = type(sample_block).executions if sample_block is not None else 0
+
+    durations = sorted(sampler.durations)
+    jitter = sorted(sampler.jitter(cycle_time))
+    return {
+        "cycles": len(durations),
+        "cycle_time_p50": percentile(durations, 0.5),
+        "cycle_time_p90": percentile(durations, 0.9),
+        "cycle_time_p99": percentile(durations, 0.99),
+        "cycle_time_max": durations[-1] if durations else 0.0,
+        "jitter_p50": percentile(jitter, 0.5),
+        "jitter_p99": percentile(jitter, 0.99),
+        "jitter_max": jitter[-1] if jitter else 0.0,
+        "overruns": sum(1 for d in durations if d > cycle_time),
+        "cycles_per_second": len(durations) / wall if wall else 0.0,
+        "blocks_per_second": executions / wall if wall else 0.0,
+        "db_writes_per_second": engine.persister.written / wall if wall else 0.0,
+        "db_flushes": engine.persister.flushes,
+        "max_rss_mb": max_rss_mb(),
+    }
+
+def compare_results(current, baseline, threshold=0.1):
+    """
+    Compare two result dicts on the tracked metrics. Returns the regressions,
+    i.e. metrics worse than the baseline by more than ``threshold`` (relative).
+    """
+    regressions = []
+    for metric, higher_is_better in TRACKED_METRICS.items():
+        old, new = baseline.get(metric), current.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (-change if higher_is_better else change) > threshold:
+            regressions.append({"metric": metric, "baseline": old, "current": new, "change": change})
+    return regressions
+
+def load_results(path):
+    with open(path) as f:
+        data = json.load(f)
+    return data.get("results", data)
+
+def save_results(path, results, params):
+    with open(path, "w") as f:
+        json.dump({
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": params,
+            "results": results,
+        }, f, indent=2)
+    logger.info("Risultati del benchmark salvati in %s", path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del FastAsyncEngine")
+    parser.add_argument("--blocks", type=int, default=100, help="Numero di blocchi sintetici")
+    parser.add_argument("--devices", type=int, default=10, help="Numero di ConfigurableMockDriver")
+    parser.add_argument("--duration", type=float, default=10.0, help="Durata in secondi")
+    parser.add_argument("--cycle-time", type=float, default=0.005, help="Tempo di ciclo in secondi")
+    parser.add_argument("--latency", type=float, default=0.0005, help="Latenza simulata dei dispositivi")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Tasso di errore dei dispositivi")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scheduler", choices=["deadline", "default"], default="deadline")
+    parser.add_argument("--output", default="benchmark_results.json", help="File JSON dei risultati")
+    parser.add_argument("--baseline", help="File JSON di baseline da confrontare")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Regressione relativa tollerata")
+    args = parser.parse_args(argv)
+
+    params = {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "threshold")}
+    results = asyncio.run(run_benchmark(
+        blocks=args.blocks, devices=args.devices, duration=args.duration, cycle_time=args.cycle_time,
+        latency=args.latency, error_rate=args.error_rate, seed=args.seed, scheduler=args.scheduler,
+    ))
+    save_results(args.output, results, params)
+    print(json.dumps(results, indent=2))
+    if not args.baseline:
+        return 0
+    regressions = compare_results(results, load_results(args.baseline), args.threshold)
+    for r in regressions:
+        print(f"REGRESSIONE {r['metric']}: {r['baseline']:.6g} -> {r['current']:.6g} ({r['change']:+.1%})")
+    if regressions:
+        return 1
+    print(f"Nessuna regressione oltre il {args.threshold:.0%} rispetto a {args.baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
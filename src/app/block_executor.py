@@ -0,0 +1,61 @@
+import time
+
+INLINE = "inline"
+THREAD = "thread"
+PROCESS = "process"
+EXECUTION_MODES = (INLINE, THREAD, PROCESS)
+
+def timed_execute(block, *args):
+    """Run a synchronous block and return its execution time (measured where it runs)."""
+    start = time.perf_counter()
+    block.execute(*args)
+    return time.perf_counter() - start
+
+class BlockExecutionPolicy:
+    """
+    Chooses where synchronous blocks run based on their measured execution time.
+
+    Blocks start on the thread pool. After ``warmup`` samples, blocks whose
+    moving average stays under ``inline_threshold`` run inline on the event
+    loop; they move back to the pool when the average exceeds twice the
+    threshold. An explicit mode (``block_execution_modes`` config entry or
+    ``execution_mode`` block attribute) is never reclassified; ``process``
+    can only be chosen explicitly.
+    """
+
+    def __init__(self, inline_threshold=0.0001, warmup=5, alpha=0.2, overrides=None):
+        self.inline_threshold = inline_threshold
+        self.warmup = warmup
+        self.alpha = alpha
+        self.overrides = dict(overrides or {})
+        self._averages = {}
+        self._samples = {}
+        self._inline = set()
+
+    def mode(self, name, block):
+        override = self.overrides.get(name) or getattr(block, "execution_mode", None)
+        if override:
+            return override
+        return INLINE if name in self._inline else THREAD
+
+    def record(self, name, exec_time):
+        samples = self._samples.get(name, 0) + 1
+        self._samples[name] = samples
+        average = self._averages.get(name)
+        average = exec_time if average is None else average + self.alpha * (exec_time - average)
+        self._averages[name] = average
+        if samples < self.warmup:
+            return
+        if name in self._inline:
+            if average > 2 * self.inline_threshold:
+                self._inline.discard(name)
+        elif average < self.inline_threshold:
+            self._inline.add(name)
+
+    def average(self, name):
+        return self._averages.get(name)
+
+    def forget(self, name):
+        self._averages.pop(name, None)
+        self._samples.pop(name, None)
+        self._inline.discard(name)
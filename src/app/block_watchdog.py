@@ -0,0 +1,114 @@
+from collections import deque
+from prometheus_client import Counter, Histogram
+from logging_config import logger
+
+budget_usage_histogram = Histogram('engine_block_budget_usage_ratio', 'Frazione del budget di esecuzione usata dal blocco',
+                                   ['engine', 'block'], buckets=(0.1, 0.25, 0.5, 0.75, 0.9, 1.0, 1.5, 2.0, 5.0))
+block_overrun_counter = Counter('engine_block_budget_overruns_total', 'Esecuzioni di un blocco oltre il budget',
+                                ['engine', 'block'])
+block_quarantine_counter = Counter('engine_block_quarantines_total', 'Blocchi messi in quarantena dal watchdog',
+                                   ['engine', 'block'])
+
+class BlockWatchdog:
+    """
+    Per-block execution budgets and overrun watchdog.
+
+    Budgets come from the ``budgets`` mapping, a ``budget`` block attribute or
+    the default of the block's task class. A block exceeding its budget
+    ``max_overruns`` times in a row is quarantined (not executed) for
+    ``quarantine_cycles`` ticks. The usage ratio of the last ``window``
+    executions is kept for percentile reports.
+    """
+
+    def __init__(self, budgets=None, max_overruns=3, quarantine_cycles=1000, window=256, engine_id="engine"):
+        self.budgets = dict(budgets or {})
+        self.max_overruns = max_overruns
+        self.quarantine_cycles = quarantine_cycles
+        self.window = window
+        self.engine_id = engine_id
+        self._budgets = {}
+        self._usage = {}
+        self._consecutive = {}
+        self._overruns = {}
+        self._quarantined_until = {}
+        self._handles = {}
+
+    def set_budget(self, name, block, default=None):
+        self._budgets[name] = self.budgets.get(name) or getattr(block, "budget", None) or default
+        if name not in self._handles:
+            self._usage[name] = deque(maxlen=self.window)
+            self._handles[name] = (
+                budget_usage_histogram.labels(engine=self.engine_id, block=name),
+                block_overrun_counter.labels(engine=self.engine_id, block=name),
+                block_quarantine_counter.labels(engine=self.engine_id, block=name),
+            )
+
+    def budget_of(self, name):
+        return self._budgets.get(name)
+
+    def is_quarantined(self, name, tick):
+        until = self._quarantined_until.get(name)
+        if until is None:
+            return False
+        if tick < until:
+            return True
+        del self._quarantined_until[name]
+        logger.info("Blocco %s uscito dalla quarantena.", name)
+        return False
+
+    def record(self, name, exec_time, tick):
+        budget = self._budgets.get(name)
+        if not budget or name not in self._handles:
+            return
+        usage = exec_time / budget
+        self._usage[name].append(usage)
+        self._handles[name][0].observe(usage)
+        if usage > 1.0:
+            self._overrun(name, tick)
+        else:
+            self._consecutive[name] = 0
+
+    def record_timeout(self, name, tick):
+        """Record a run interrupted or deferred because it hit the budget."""
+        if name in self._handles:
+            self._usage[name].append(1.0)
+            self._handles[name][0].observe(1.0)
+        self._overrun(name, tick)
+
+    def _overrun(self, name, tick):
+        self._overruns[name] = self._overruns.get(name, 0) + 1
+        consecutive = self._consecutive.get(name, 0) + 1
+        self._consecutive[name] = consecutive
+        handles = self._handles.get(name)
+        if handles:
+            handles[1].inc()
+        if consecutive >= self.max_overruns:
+            self._consecutive[name] = 0
+            self._quarantined_until[name] = tick + self.quarantine_cycles
+            if handles:
+                handles[2].inc()
+            logger.warning("Blocco %s in quarantena per %d cicli dopo %d overrun consecutivi.",
+                           name, self.quarantine_cycles, consecutive)
+
+    def percentiles(self, name, quantiles=(0.5, 0.9, 0.99)):
+        samples = sorted(self._usage.get(name, ()))
+        if not samples:
+            return {}
+        return {f"p{round(q * 100)}": samples[min(int(q * len(samples)), len(samples) - 1)] for q in quantiles}
+
+    def report(self):
+        """Budget usage percentiles, overruns and quarantine status of every block."""
+        return {
+            name: {
+                "budget": self._budgets.get(name),
+                "usage": self.percentiles(name),
+                "overruns": self._overruns.get(name, 0),
+                "quarantined": name in self._quarantined_until,
+            }
+            for name in self._handles
+        }
+
+    def forget(self, name):
+        for registry in (self._budgets, self._usage, self._consecutive, self._overruns,
+                         self._quarantined_until, self._handles):
+            registry.pop(name, None)
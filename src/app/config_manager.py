@@ -20,14 +20,9 @@ except ImportError:
 
 class ConfigManager:
     def __init__(self, env=None, schema_file=None):
-        # Vault integration stub
-        try:
-            import hvac
-            client = hvac.Client()
-            secret = client.secrets.kv.v2.read_secret_version(path='engineproject/config')
-            self.vault_key = secret['data']['data']['encryption_key']
-        except Exception:
-            self.vault_key = os.getenv('CONFIG_KEY')
+        # Vault is only contacted when the key is first needed (see vault_key)
+        self._vault_key = None
+        self._vault_resolved = False
         self.last_loaded = None  # timestamp of last config load
         # Default schema file
         if schema_file is None:
@@ -65,6 +60,20 @@ class ConfigManager:
             logger.error("Errore nel parsing JSON dello schema da %s: %s", self.schema_file, e)
         self.load_config()
 
+    @property
+    def vault_key(self):
+        """Encryption key from Vault (integration stub), falling back to CONFIG_KEY; resolved on first use."""
+        if not self._vault_resolved:
+            try:
+                import hvac
+                client = hvac.Client()
+                secret = client.secrets.kv.v2.read_secret_version(path='engineproject/config')
+                self._vault_key = secret['data']['data']['encryption_key']
+            except Exception:
+                self._vault_key = os.getenv('CONFIG_KEY')
+            self._vault_resolved = True
+        return self._vault_key
+
     def load_config(self):
         # decrypt config if needed
         key = os.getenv('CONFIG_KEY') or Fernet.generate_key()
@@ -74,7 +83,7 @@ class ConfigManager:
             self.config = json.loads(data)
         except Exception:
             pass
-        ttl = self.schema.get('config',{}).get('reload_ttl_seconds', 5)
+        ttl = (self.schema or {}).get('config', {}).get('reload_ttl_seconds', 5)
         now = time.time()
         if self.last_loaded and now - self.last_loaded < ttl:
             return self.config  # skip reload within TTL
@@ -147,6 +156,12 @@ class ConfigManager:
         except (ValueError, TypeError):
             return default
 
+    def get_float(self, key, default=0.0):
+        try:
+            return float(self.get(key, default))
+        except (ValueError, TypeError):
+            return default
+
     def get_bool(self, key, default=False):
         val = self.get(key, default)
         if isinstance(val, bool):
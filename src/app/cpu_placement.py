@@ -0,0 +1,133 @@
+import os
+import threading
+from prometheus_client import Gauge
+from logging_config import logger
+from config_manager import config_manager
+
+placement_info_gauge = Gauge('engine_cpu_placement_info', 'Placement CPU applicato (1 = attivo)',
+                             ['target', 'cpus', 'policy'])
+
+POLICIES = {"fifo": "SCHED_FIFO", "rr": "SCHED_RR", "other": "SCHED_OTHER", "batch": "SCHED_BATCH", "idle": "SCHED_IDLE"}
+
+# target name -> placement actually applied, for status reports
+applied_placements = {}
+_lock = threading.Lock()
+# affinity of the process before any placement, where housekeeping runs by default
+_initial_cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None
+
+def parse_cpus(spec):
+    """CPU set from a list of ints or a string like ``"0-3,6"``."""
+    if spec is None:
+        return None
+    if isinstance(spec, int):
+        return {spec}
+    if isinstance(spec, str):
+        cpus = set()
+        for part in spec.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if "-" in part:
+                first, last = part.split("-", 1)
+                cpus.update(range(int(first), int(last) + 1))
+            else:
+                cpus.add(int(part))
+        return cpus
+    return {int(cpu) for cpu in spec}
+
+def placement_config():
+    return config_manager.get("cpu_placement", {}) or {}
+
+def apply_placement(target, spec, tid=0):
+    """
+    Apply ``spec`` (``cpus``, ``policy``, ``priority``, ``nice``) to the thread
+    ``tid`` (a ``Thread.native_id``; 0 is the calling thread on Linux). Threads
+    started afterwards inherit the settings of their creator. Settings the
+    platform or the process privileges do not allow are skipped with a warning.
+    """
+    if not spec:
+        return None
+    applied = {}
+    cpus = parse_cpus(spec.get("cpus"))
+    if cpus:
+        try:
+            os.sched_setaffinity(tid, cpus)
+            applied["cpus"] = sorted(cpus)
+        except (AttributeError, OSError, ValueError) as e:
+            logger.warning("Affinità CPU %s non applicata a %s: %s", sorted(cpus), target, e)
+    policy = spec.get("policy")
+    if policy:
+        try:
+            sched_policy = getattr(os, POLICIES[policy])
+            priority = int(spec.get("priority", 0 if policy not in ("fifo", "rr") else 1))
+            os.sched_setscheduler(tid, sched_policy, os.sched_param(priority))
+            applied["policy"] = policy
+            applied["priority"] = priority
+        except (KeyError, AttributeError, OSError, ValueError) as e:
+            logger.warning("Policy di scheduling %s non applicata a %s: %s", policy, target, e)
+    nice = spec.get("nice")
+    if nice is not None:
+        try:
+            os.setpriority(os.PRIO_PROCESS, tid, int(nice))
+            applied["nice"] = int(nice)
+        except (AttributeError, OSError, ValueError) as e:
+            logger.warning("Nice %s non applicato a %s: %s", nice, target, e)
+    with _lock:
+        previous = applied_placements.get(target)
+        if previous:
+            placement_info_gauge.labels(target, _cpus_label(previous), previous.get("policy", "")).set(0)
+        applied_placements[target] = applied
+    placement_info_gauge.labels(target, _cpus_label(applied), applied.get("policy", "")).set(1)
+    if applied:
+        logger.info("Placement CPU applicato a %s: %s", target, applied)
+    return applied
+
+def _cpus_label(applied):
+    return ",".join(str(cpu) for cpu in applied.get("cpus", ()))
+
+def worker_spec(index):
+    """
+    Placement of an engine worker process: its entry in ``workers``, otherwise
+    one CPU of ``engine_loop.cpus`` picked round-robin, with the policy of
+    ``engine_loop``.
+    """
+    config = placement_config()
+    workers = config.get("workers") or {}
+    spec = workers.get(str(index)) if isinstance(workers, dict) else (workers[index] if index < len(workers) else None)
+    if spec:
+        return spec
+    loop_spec = dict(config.get("engine_loop") or {})
+    cpus = sorted(parse_cpus(loop_spec.get("cpus")) or ())
+    if cpus:
+        loop_spec["cpus"] = [cpus[index % len(cpus)]]
+    return loop_spec
+
+def engine_loop_spec():
+    """Placement of the event loop thread running engines in-process."""
+    return placement_config().get("engine_loop")
+
+def engine_spec(engine_id):
+    """Placement of the block threads of one engine (``engines.<engine_id>``)."""
+    return (placement_config().get("engines") or {}).get(engine_id)
+
+def housekeeping_spec():
+    """
+    Placement of the auxiliary threads: ``housekeeping``. When ``engine_loop``
+    is configured, helpers started from the pinned loop thread must not keep
+    its CPUs and real-time policy: they default to the initial affinity and
+    to the default policy.
+    """
+    config = placement_config()
+    spec = config.get("housekeeping")
+    if not config.get("engine_loop"):
+        return spec
+    if not spec:
+        return {"cpus": _initial_cpus, "policy": "other"}
+    return spec if "policy" in spec else dict(spec, policy="other")
+
+def pin_housekeeping_thread(name, tid=0):
+    """
+    Move an auxiliary thread (backup, health, driver polling, logging, state
+    persistence, Redis mirror, loop executor) to the housekeeping cores.
+    """
+    return apply_placement(name, housekeeping_spec(), tid)
@@ -0,0 +1,81 @@
+import asyncio
+from prometheus_client import Counter, Histogram
+from logging_config import logger
+from engine_clock import default_clock
+
+JITTER_BUCKETS = (1e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 5e-2, 0.1)
+
+cycle_jitter_histogram = Histogram('engine_cycle_jitter_seconds', 'Scarto tra deadline e avvio effettivo del ciclo',
+                                   ['engine'], buckets=JITTER_BUCKETS)
+cycle_overrun_histogram = Histogram('engine_cycle_overrun_seconds', 'Ritardo dei cicli avviati oltre la deadline',
+                                    ['engine'], buckets=JITTER_BUCKETS)
+cycle_skipped_counter = Counter('engine_cycles_skipped_total', 'Cicli saltati per overrun', ['engine'])
+
+OVERRUN_POLICIES = ("skip", "catch_up", "shift")
+
+class DeadlineScheduler:
+    """
+    Drift-free scheduler targeting absolute deadlines on the monotonic clock.
+
+    Sleeps on the event loop until ``spin_threshold`` seconds before the
+    deadline, then spins (yielding to the loop) for the remainder; the clock
+    is injectable so simulations can run against virtual time. When a
+    cycle ends past the next deadline the overrun policy applies:
+
+    - skip: drop the missed periods and keep the original phase
+    - catch_up: run the missed cycles back to back until on schedule
+    - shift: start immediately and re-anchor the phase on the late start
+    """
+
+    def __init__(self, cycle_time, overrun_policy="skip", spin_threshold=0.0005, engine_id="engine", clock=None):
+        if overrun_policy not in OVERRUN_POLICIES:
+            raise ValueError(f"Overrun policy non valida: {overrun_policy}")
+        self.cycle_time = cycle_time
+        self.overrun_policy = overrun_policy
+        self.spin_threshold = spin_threshold
+        self.engine_id = engine_id
+        self.clock = clock or default_clock
+        self.last_jitter = 0.0
+        self.overruns = 0
+        self.skipped = 0
+        self._deadline = None
+        self._jitter = cycle_jitter_histogram.labels(engine=engine_id)
+        self._overrun = cycle_overrun_histogram.labels(engine=engine_id)
+        self._skipped = cycle_skipped_counter.labels(engine=engine_id)
+
+    def reset(self):
+        """Re-anchor the schedule on the next cycle (e.g. after a pause)."""
+        self._deadline = None
+
+    async def get_delay(self, cycle_start, cycle_duration):
+        if self._deadline is None:
+            return max(self.cycle_time - cycle_duration, 0)
+        return max(self._deadline - self.clock.monotonic(), 0)
+
+    async def wait_for_next_cycle(self, cycle_start, cycle_duration):
+        now = self.clock.monotonic()
+        if self._deadline is None:
+            # anchor the phase on the start of the cycle that just ended
+            self._deadline = now - cycle_duration + self.cycle_time
+        lateness = now - self._deadline
+        if lateness > 0:
+            self.overruns += 1
+            self._overrun.observe(lateness)
+            if self.overrun_policy == "catch_up":
+                self._deadline += self.cycle_time
+                # no wait, but still hand the loop over to the other tasks
+                await asyncio.sleep(0)
+                return
+            if self.overrun_policy == "shift":
+                self._deadline = now + self.cycle_time
+                await asyncio.sleep(0)
+                return
+            missed = int(lateness // self.cycle_time) + 1
+            self.skipped += missed
+            self._skipped.inc(missed)
+            self._deadline += missed * self.cycle_time
+            logger.debug("Engine %s: overrun di %.6fs, saltati %d cicli.", self.engine_id, lateness, missed)
+        await self.clock.sleep_until(self._deadline, self.spin_threshold)
+        self.last_jitter = self.clock.monotonic() - self._deadline
+        self._jitter.observe(self.last_jitter)
+        self._deadline += self.cycle_time
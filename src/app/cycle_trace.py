@@ -0,0 +1,68 @@
+import json
+import os
+from collections import deque
+from logging_config import logger
+
+LOOP_LANE = 0
+
+class CycleTraceRecorder:
+    """
+    Always-on ring buffer of the spans of the last ``capacity`` cycles.
+
+    Spans are plain tuples of ``time.perf_counter_ns`` timestamps appended to
+    the current cycle; blocks get their own lane so overlapping executions
+    show up side by side once exported as Chrome trace / Perfetto JSON.
+    """
+
+    def __init__(self, capacity=100, engine_id="engine"):
+        self.engine_id = engine_id
+        self._cycles = deque(maxlen=capacity)
+        self._current = None
+        self._lanes = {}
+
+    def begin_cycle(self, tick):
+        self._current = (tick, [])
+        self._cycles.append(self._current)
+
+    def span(self, name, start_ns, end_ns, category="engine", lane=None):
+        if self._current is None:
+            return
+        if lane is None:
+            lane = LOOP_LANE
+        self._current[1].append((name, category, start_ns, end_ns, lane))
+
+    def block_lane(self, block_name):
+        lane = self._lanes.get(block_name)
+        if lane is None:
+            lane = self._lanes[block_name] = len(self._lanes) + 1
+        return lane
+
+    def export(self, last_n=None):
+        """Return the recorded cycles as a Chrome trace event dict."""
+        cycles = list(self._cycles)
+        if last_n:
+            cycles = cycles[-last_n:]
+        pid = os.getpid()
+        events = [{"ph": "M", "name": "process_name", "pid": pid, "tid": LOOP_LANE,
+                   "args": {"name": f"engine {self.engine_id}"}},
+                  {"ph": "M", "name": "thread_name", "pid": pid, "tid": LOOP_LANE, "args": {"name": "event loop"}}]
+        events.extend({"ph": "M", "name": "thread_name", "pid": pid, "tid": lane, "args": {"name": name}}
+                      for name, lane in list(self._lanes.items()))
+        for tick, spans in cycles:
+            for name, category, start_ns, end_ns, lane in list(spans):
+                events.append({
+                    "name": name, "cat": category, "ph": "X", "pid": pid, "tid": lane,
+                    "ts": start_ns / 1000, "dur": (end_ns - start_ns) / 1000, "args": {"cycle": tick},
+                })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dump(self, path, trace=None):
+        """Write a trace (by default the whole buffer) to ``path``."""
+        trace = trace if trace is not None else self.export()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(trace, f)
+        logger.info("Trace dei cicli salvato in %s", path)
+        return path
@@ -1,8 +1,16 @@
-import threading
-
+import atexit
+import bisect
+import json
+import os
+from fnmatch import fnmatchcase
+import struct
 import threading
 import time
+from array import array
+from multiprocessing import resource_tracker, shared_memory
 from logging_config import logger
+from config_manager import config_manager
+from redis_mirror import RedisMirror, decode_tag
 
 try:
     import redis
@@ -11,83 +19,676 @@ except ImportError:
     REDIS_AVAILABLE = False
     logger.warning("Modulo redis non installato; utilizzo solo DataPool locale.")
 
+# data_type -> array typecode of scalar variables; any other type (and bool,
+# so it reads back as a bool) is kept in a plain list holding any Python value
+TYPE_CODES = {
+    "byte": "B",
+    "word": "H",
+    "dword": "I",
+    "int": "q",
+    "dint": "q",
+    "float": "d",
+    "real": "d",
+    "double": "d",
+}
+OBJECT_TYPE = "object"
+
+QUALITY_UNSET = 0
+QUALITY_BAD = 1
+QUALITY_UNCERTAIN = 2
+QUALITY_GOOD = 3
+
+class _Column:
+    """Contiguous storage of all the variables sharing a data type."""
+
+    def __init__(self, data_type):
+        self.data_type = data_type
+        code = TYPE_CODES.get(data_type)
+        self.values = array(code) if code else []
+        self.default = 0 if code else None
+
+    def append(self):
+        self.values.append(self.default)
+        return len(self.values) - 1
+
+class Subscription:
+    """
+    Change subscription to the variables matching ``patterns`` (names or
+    glob patterns). A value is notified when it moves past the deadband from
+    the last notified value (absolute, or percent of it with ``percent``) or
+    when its quality changes; without a deadband any change is notified.
+    """
+
+    def __init__(self, patterns, callback, deadband=None, percent=False):
+        self.patterns = (patterns,) if isinstance(patterns, str) else tuple(patterns)
+        self.callback = callback
+        self.deadband = deadband
+        self.percent = percent
+        self.handles = []
+        self._seen = {}
+        self._last = {}
+
+    def matches(self, name):
+        return any(fnmatchcase(name, pattern) for pattern in self.patterns)
+
+    def passes(self, handle, value, quality):
+        last = self._last.get(handle)
+        if last is not None and quality == last[1] and not self._exceeds(last[0], value):
+            return False
+        self._last[handle] = (value, quality)
+        return True
+
+    def _exceeds(self, last, value):
+        if not self.deadband:
+            return value != last
+        try:
+            delta = abs(value - last)
+        except TypeError:
+            return value != last
+        limit = abs(last) * self.deadband / 100 if self.percent else self.deadband
+        return delta > limit
+
 class DataPool:
-    _lock = threading.RLock()
-    def __init__(self, use_redis=False, redis_config=None):
-        self._pool = {}
+    """
+    Process data image backed by typed arrays.
+
+    Variables registered with an explicit scalar ``data_type`` (see
+    ``TYPE_CODES``) and ``length`` 1 are grouped by type into contiguous
+    arrays; every other variable, including the default ``object`` type, is
+    kept in a list and holds any Python value. Timestamps and quality live in
+    parallel arrays. ``register_variable`` returns an integer handle giving O(1),
+    lock-free access through ``get``/``set`` and the bulk ``get_many``/
+    ``set_many``; the name-based API is a thin layer resolving names to handles.
+    A variable that was never written reads as None (quality ``QUALITY_UNSET``).
+
+    Every write bumps a per-variable version; ``dispatch_changes`` compares the
+    versions of the subscribed variables with the last dispatch, so however
+    many writes happen in between, each subscriber gets one callback.
+    Callbacks run on the pool's dispatcher thread, never on an engine loop:
+    running engines only ``request_dispatch`` at the end of every cycle, and
+    requests made while a dispatch is in progress are coalesced into the next
+    one. With a ``dispatch_interval`` the thread also dispatches when no
+    request came within the interval, so subscribers are notified without
+    engines or while they are paused.
+    With ``use_redis`` a RedisMirror copies the changed variables to Redis in
+    the background instead of writing through on every update.
+
+    The address layout is kept in a sorted ``(address, handle)`` index updated
+    on registration; the contiguous groups are computed from it once per
+    layout change and then served from cache.
+    """
+
+    def __init__(self, use_redis=False, redis_config=None, dispatch_interval=0.0):
+        # structural changes (registration) only; reads and writes are lock-free
         self._lock = threading.Lock()
+        self._handles = {}
+        self._names = []
+        self._types = []
+        self._columns = {}
+        self._column_of = []
+        self._offsets = array("q")
+        self._addresses = array("q")
+        self._lengths = array("q")
+        self._timestamps = array("d")
+        self._quality = array("B")
+        self._versions = array("Q")
+        self._index = []
+        self._max_length = 0
+        self._groups = None
+        self._init_dispatch(dispatch_interval)
         self.use_redis = use_redis and REDIS_AVAILABLE
         if self.use_redis:
             redis_config = redis_config or {"host": "localhost", "port": 6379, "db": 0}
             self.redis_client = redis.StrictRedis(**redis_config)
+            self.mirror = RedisMirror(
+                self, self.redis_client,
+                interval=config_manager.get_float("datapool_redis_interval", 0.1),
+                batch_size=config_manager.get_int("datapool_redis_batch_size", 500),
+            )
+            self.mirror.start()
             logger.info("DataPool: Modalità Redis abilitata.")
         else:
             self.redis_client = None
+            self.mirror = None
 
-    def register_variable(self, name, address, length=1, data_type="int", initial_value=None):
-        with self._lock:
-            self._pool[name] = {
-                "address": address,
-                "length": length,
-                "type": data_type,
-                "value": initial_value,
-                "timestamp": time.time()
-            }
-            logger.debug("Variabile registrata: %s", name)
-            if self.use_redis:
-                self.redis_client.hset("datapool", name, str(self._pool[name]))
+    def __len__(self):
+        return len(self._names)
 
-    def update_variable(self, name, value):
+    def register_variable(self, name, address, length=1, data_type=OBJECT_TYPE, initial_value=None):
+        """Register (or re-register) a variable and return its integer handle."""
+        storage = data_type if data_type in TYPE_CODES and length == 1 else OBJECT_TYPE
         with self._lock:
-            if name in self._pool:
-                self._pool[name]["value"] = value
-                self._pool[name]["timestamp"] = time.time()
-                logger.debug("Variabile aggiornata: %s = %s", name, value)
-                if self.use_redis:
-                    self.redis_client.hset("datapool", name, str(self._pool[name]))
+            column = self._columns.get(storage)
+            if column is None:
+                column = self._columns[storage] = _Column(storage)
+            handle = self._handles.get(name)
+            if handle is None:
+                handle = len(self._names)
+                self._names.append(name)
+                self._types.append(data_type)
+                self._column_of.append(column)
+                self._offsets.append(column.append())
+                self._addresses.append(address)
+                self._lengths.append(length)
+                self._timestamps.append(time.time())
+                self._quality.append(QUALITY_UNSET)
+                self._versions.append(0)
+                self._handles[name] = handle
+                self._index_insert(handle)
+                for subscription in self._subscriptions:
+                    if subscription.matches(name):
+                        subscription.handles.append(handle)
             else:
-                raise KeyError(f"Variabile {name} non registrata nel DataPool.")
+                if self._column_of[handle] is not column:
+                    # type changed: move the variable to a slot of the new column
+                    self._column_of[handle] = column
+                    self._offsets[handle] = column.append()
+                self._types[handle] = data_type
+                if self._addresses[handle] != address or self._lengths[handle] != length:
+                    del self._index[bisect.bisect_left(self._index, (self._addresses[handle], handle))]
+                    self._addresses[handle] = address
+                    self._lengths[handle] = length
+                    self._index_insert(handle)
+                self._quality[handle] = QUALITY_UNSET
+        if initial_value is not None:
+            self.set(handle, initial_value)
+        logger.debug("Variabile registrata: %s (handle %d)", name, handle)
+        if self.mirror is not None:
+            self.mirror.mark(handle)
+        return handle
+
+    def handle_of(self, name):
+        try:
+            return self._handles[name]
+        except KeyError:
+            raise KeyError(f"Variabile {name} non registrata nel DataPool.") from None
+
+    def type_of(self, name):
+        """Declared data type of a variable, None if it is not registered."""
+        handle = self._handles.get(name)
+        return None if handle is None else self._types[handle]
+
+    def handles_of(self, names):
+        return [self.handle_of(name) for name in names]
+
+    def get(self, handle):
+        if not self._quality[handle]:
+            return None
+        return self._column_of[handle].values[self._offsets[handle]]
+
+    def set(self, handle, value, quality=QUALITY_GOOD, timestamp=None):
+        try:
+            self._column_of[handle].values[self._offsets[handle]] = value
+        except (TypeError, OverflowError) as e:
+            raise self._type_error(handle, value, e) from None
+        self._timestamps[handle] = timestamp if timestamp is not None else time.time()
+        self._quality[handle] = quality
+        self._versions[handle] += 1
+        if self.mirror is not None:
+            self.mirror.mark(handle)
+
+    def read(self, handle):
+        """``(value, timestamp, quality)`` of one variable."""
+        return self.get(handle), self._timestamps[handle], self._quality[handle]
+
+    def _type_error(self, handle, value, error):
+        return TypeError(f"Valore {value!r} non valido per la variabile {self._names[handle]} "
+                         f"di tipo {self._types[handle]}: {error}")
+
+    def get_many(self, handles):
+        """Values of several handles in one pass."""
+        column_of, offsets, quality = self._column_of, self._offsets, self._quality
+        return [column_of[h].values[offsets[h]] if quality[h] else None for h in handles]
+
+    def set_many(self, handles, values, quality=QUALITY_GOOD, timestamp=None):
+        """Write several handles with one timestamp and quality."""
+        column_of, offsets, timestamps, qualities = self._column_of, self._offsets, self._timestamps, self._quality
+        versions = self._versions
+        now = timestamp if timestamp is not None else time.time()
+        for h, value in zip(handles, values):
+            try:
+                column_of[h].values[offsets[h]] = value
+            except (TypeError, OverflowError) as e:
+                raise self._type_error(h, value, e) from None
+            timestamps[h] = now
+            qualities[h] = quality
+            versions[h] += 1
+        if self.mirror is not None:
+            self.mirror.mark_many(handles)
+
+    def quality(self, handle):
+        return self._quality[handle]
+
+    def timestamp(self, handle):
+        return self._timestamps[handle]
+
+    def update_variable(self, name, value):
+        self.set(self.handle_of(name), value)
+        logger.debug("Variabile aggiornata: %s = %s", name, value)
 
     def get_variable(self, name):
+        return self.get(self.handle_of(name))
+
+    def _init_dispatch(self, interval):
+        self.dispatch_interval = interval
+        self._subscriptions = []
+        self._dispatch_lock = threading.Lock()
+        self._dispatch_requested = threading.Event()
+        self._dispatcher = None
+        self._dispatcher_stop = threading.Event()
+
+    def subscribe(self, patterns, callback, deadband=None, percent=False):
+        """
+        Call ``callback({name: value})`` from ``dispatch_changes`` with the
+        variables matching ``patterns`` that changed beyond the deadband.
+        Variables registered later are picked up when their name matches.
+        The first subscription starts the dispatcher thread when a
+        ``dispatch_interval`` is set, otherwise the first ``request_dispatch``.
+        """
+        subscription = Subscription(patterns, callback, deadband, percent)
         with self._lock:
+            subscription.handles = [h for h, name in enumerate(self._names) if subscription.matches(name)]
+            self._subscriptions.append(subscription)
+        if self.dispatch_interval > 0:
+            self._start_dispatcher()
+        return subscription
+
+    def _start_dispatcher(self):
         with self._lock:
-            if name in self._pool:
-                return self._pool[name]["value"]
-            else:
-                raise KeyError(f"Variabile {name} non registrata nel DataPool.")
+            if self._dispatcher is None:
+                self._dispatcher_stop.clear()
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, name="datapool-dispatch", daemon=True)
+                self._dispatcher.start()
+
+    def request_dispatch(self):
+        """Ask the dispatcher thread to notify the changes; cheap enough for the end of every engine cycle."""
+        if not self._subscriptions:
+            return
+        if self._dispatcher is None:
+            self._start_dispatcher()
+        self._dispatch_requested.set()
+
+    def _dispatch_loop(self):
+        from cpu_placement import pin_housekeeping_thread
+        pin_housekeeping_thread("datapool-dispatch")
+        while True:
+            self._dispatch_requested.wait(self.dispatch_interval or None)
+            if self._dispatcher_stop.is_set():
+                return
+            # cleared before dispatching: a request made meanwhile triggers another round
+            self._dispatch_requested.clear()
+            try:
+                self.dispatch_changes()
+            except Exception as e:
+                logger.error("Errore nella notifica delle variabili del DataPool: %s", e)
+
+    def stop_dispatcher(self):
+        """Stop the dispatcher thread; a later subscription or request starts it again."""
+        with self._lock:
+            dispatcher, self._dispatcher = self._dispatcher, None
+        if dispatcher is not None:
+            self._dispatcher_stop.set()
+            self._dispatch_requested.set()
+            dispatcher.join()
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def dispatch_changes(self):
+        """Notify each subscription once with its variables written since the last dispatch; returns the callbacks made."""
+        if not self._subscriptions:
+            return 0
+        notified = 0
+        versions = self._versions
+        with self._dispatch_lock:
+            for subscription in list(self._subscriptions):
+                seen = subscription._seen
+                changes = {}
+                for h in subscription.handles:
+                    version = versions[h]
+                    if seen.get(h) == version:
+                        continue
+                    seen[h] = version
+                    value, _, quality = self.read(h)
+                    if quality != QUALITY_UNSET and subscription.passes(h, value, quality):
+                        changes[self._names[h]] = value
+                if not changes:
+                    continue
+                try:
+                    subscription.callback(changes)
+                    notified += 1
+                except Exception as e:
+                    logger.error("Errore nella notifica delle variabili %s: %s", list(changes), e)
+        return notified
+
+    def _describe(self, handle):
+        return {
+            "address": self._addresses[handle],
+            "length": self._lengths[handle],
+            "type": self._types[handle],
+            "value": self.get(handle),
+            "timestamp": self._timestamps[handle],
+            "quality": self._quality[handle],
+        }
 
     def get_all_variables(self):
         with self._lock:
+            handles = dict(self._handles)
+        return {name: self._describe(handle) for name, handle in handles.items()}
+
+    def _index_insert(self, handle):
+        entry = (self._addresses[handle], handle)
+        # variables are usually registered in address order: appending keeps the index sorted
+        if not self._index or entry > self._index[-1]:
+            self._index.append(entry)
+        else:
+            bisect.insort(self._index, entry)
+        self._max_length = max(self._max_length, self._lengths[handle])
+        self._groups = None
+
+    def _rebuild_index(self):
+        self._index = sorted((address, handle) for handle, address in enumerate(self._addresses))
+        self._max_length = max(self._lengths, default=0)
+        self._groups = None
+
+    def handles_in_range(self, start, end):
+        """Handles, in address order, of the variables overlapping the addresses ``[start, end)``."""
         with self._lock:
-            return dict(self._pool)
+            index = self._index
+            # a variable starting before ``start`` can reach into the range by at most the longest length
+            first = bisect.bisect_left(index, (start - self._max_length + 1,))
+            last = bisect.bisect_left(index, (end,))
+            lengths = self._lengths
+            return [h for address, h in index[first:last] if address + lengths[h] > start]
+
+    def variables_in_range(self, start, end):
+        return [self._names[h] for h in self.handles_in_range(start, end)]
 
     def get_contiguous_groups(self):
+        """
+        Names of the variables grouped by contiguous addresses. The result is
+        cached until the layout changes and shared between callers: do not modify it.
+        """
+        groups = self._groups
+        if groups is not None:
+            return groups
         with self._lock:
-        with self._lock:
-            sorted_vars = sorted(self._pool.items(), key=lambda item: item[1]["address"])
-            groups = []
-            current_group = []
-            current_end = None
-            for name, meta in sorted_vars:
-                addr = meta["address"]
-                length = meta.get("length", 1)
-                if current_end is None or addr == current_end:
-                    current_group.append(name)
-                    current_end = addr + length
-                else:
-                    groups.append(current_group)
-                    current_group = [name]
-                    current_end = addr + length
-            if current_group:
+            if self._groups is None:
+                self._groups = self._compute_groups()
+            return self._groups
+
+    def _compute_groups(self):
+        groups = []
+        current_group = []
+        current_end = None
+        for addr, handle in self._index:
+            if current_end is None or addr == current_end:
+                current_group.append(self._names[handle])
+            else:
                 groups.append(current_group)
-            return groups
+                current_group = [self._names[handle]]
+            current_end = addr + self._lengths[handle]
+        if current_group:
+            groups.append(current_group)
+        return groups
 
     def sync_with_redis(self):
-        if not self.use_redis:
+        """Send every variable to Redis now instead of waiting for the mirror interval."""
+        if self.mirror is None:
             return
-        with self._lock:
-            for name, data in self._pool.items():
-                self.redis_client.hset("datapool", name, str(data))
-            logger.debug("DataPool sincronizzato con Redis.")
+        self.mirror.mark_many(range(len(self._names)))
+        self.mirror.flush()
+        logger.debug("DataPool sincronizzato con Redis.")
+
+    def load_from_redis(self):
+        """``{name: {value, timestamp, quality}}`` as currently mirrored in Redis."""
+        if self.redis_client is None:
+            return {}
+        raw = self.redis_client.hgetall(self.mirror.key)
+        return {(name.decode() if isinstance(name, bytes) else name): decode_tag(value) for name, value in raw.items()}
+
+# data_type -> memoryview format of the 8-byte slots of a SharedDataPool
+SHARED_TYPE_CODES = dict({data_type: ("d" if code == "d" else "q") for data_type, code in TYPE_CODES.items()}, bool="q")
+
+_SHM_MAGIC = b"VEDPOOL1"
+_SHM_HEADER = struct.Struct("<8sII")
+_MAX_READ_SPINS = 100000
+# segments this process owns, hence keeps registered with its resource tracker
+_owned_segments = set()
+
+def _untrack(shm):
+    # Python < 3.13 tracks every opened segment and unlinks it when the process
+    # exits: only the owner of the segment may do that
+    if shm._name not in _owned_segments:
+        resource_tracker.unregister(shm._name, "shared_memory")
+
+def _attach_shared_memory(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        _untrack(shm)
+        return shm
+
+class SharedDataPool(DataPool):
+    """
+    DataPool whose values live in a ``multiprocessing.shared_memory`` segment,
+    so every process attached to it (engine workers, API, dashboard) reads the
+    live tags without syscalls or serialization.
+
+    The layout is fixed when the segment is created and stored in its header:
+    one 8-byte value, timestamp, quality and sequence counter per tag. Writes
+    follow a seqlock: the counter is odd while a write is in progress, and a
+    reader retries until it sees the same even counter before and after
+    reading, so writers never wait for readers. Each tag must have a single
+    writer at a time.
+    """
+
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+        self.use_redis = False
+        self.redis_client = None
+        self.mirror = None
+        self._lock = threading.Lock()
+        self._init_dispatch(0.0)
+        magic, count, layout_size = _SHM_HEADER.unpack_from(shm.buf, 0)
+        if magic != _SHM_MAGIC:
+            raise ValueError(f"Il segmento {shm.name} non contiene un DataPool condiviso.")
+        offset = _SHM_HEADER.size
+        self.layout = json.loads(bytes(shm.buf[offset:offset + layout_size]))
+        offset = _aligned(offset + layout_size)
+        self._seq = shm.buf[offset:offset + 8 * count].cast("Q")
+        # the seqlock counters double as versions, so writes of other processes are dispatched too
+        self._versions = self._seq
+        offset += 8 * count
+        self._values = shm.buf[offset:offset + 8 * count]
+        views = {"q": self._values.cast("q"), "d": self._values.cast("d")}
+        offset += 8 * count
+        self._timestamps = shm.buf[offset:offset + 8 * count].cast("d")
+        offset += 8 * count
+        self._quality = shm.buf[offset:offset + count].cast("B")
+        self._value_views = list(views.values())
+        self._names = [tag["name"] for tag in self.layout]
+        self._handles = {name: handle for handle, name in enumerate(self._names)}
+        self._types = [tag["data_type"] for tag in self.layout]
+        self._column_of = [views[SHARED_TYPE_CODES[data_type]] for data_type in self._types]
+        # bools share the integer slots but read back as bools
+        self._bools = frozenset(h for h, data_type in enumerate(self._types) if data_type == "bool")
+        self._addresses = array("q", (tag["address"] for tag in self.layout))
+        self._lengths = array("q", (tag["length"] for tag in self.layout))
+        self._rebuild_index()
+
+    @classmethod
+    def create(cls, name, tags, owner=True):
+        """
+        Create the segment ``name`` for ``tags``: dicts with ``name``, ``address``
+        and optional ``length`` and ``data_type`` (default "float"). Without
+        ``owner`` the segment outlives this process, until its owner removes it.
+        """
+        layout = []
+        for tag in tags:
+            data_type = tag.get("data_type", "float")
+            if data_type not in SHARED_TYPE_CODES:
+                raise ValueError(f"Tipo {data_type} della variabile {tag['name']} non supportato dal DataPool condiviso.")
+            layout.append({"name": tag["name"], "address": tag["address"],
+                           "length": tag.get("length", 1), "data_type": data_type})
+        encoded = json.dumps(layout).encode()
+        count = len(layout)
+        size = _aligned(_SHM_HEADER.size + len(encoded)) + 25 * count
+        shm = shared_memory.SharedMemory(name=name, create=True, size=max(size, 1))
+        if owner:
+            _owned_segments.add(shm._name)
+        else:
+            _untrack(shm)
+        _SHM_HEADER.pack_into(shm.buf, 0, _SHM_MAGIC, count, len(encoded))
+        shm.buf[_SHM_HEADER.size:_SHM_HEADER.size + len(encoded)] = encoded
+        pool = cls(shm, owner=owner)
+        now = time.time()
+        for handle in range(count):
+            pool._timestamps[handle] = now
+        logger.info("DataPool condiviso %s creato con %d variabili.", name, count)
+        return pool
+
+    @classmethod
+    def attach(cls, name):
+        return cls(_attach_shared_memory(name))
+
+    @classmethod
+    def open(cls, name, tags, owner=False):
+        """
+        Attach to ``name`` if another process already created it, otherwise
+        create it. Whichever process gets there first, the segment is removed
+        only by its owner (see ``take_ownership``).
+        """
+        try:
+            pool = cls.attach(name)
+        except FileNotFoundError:
+            try:
+                return cls.create(name, tags, owner=owner)
+            except FileExistsError:
+                # created concurrently: wait for the creator to write the header
+                for _ in range(100):
+                    try:
+                        pool = cls.attach(name)
+                        break
+                    except ValueError:
+                        time.sleep(0.01)
+                else:
+                    pool = cls.attach(name)
+        if [tag["name"] for tag in tags] != pool._names:
+            logger.warning("Il layout del DataPool condiviso %s differisce dalla configurazione; uso quello del segmento.", name)
+        return pool
+
+    def register_variable(self, name, address, length=1, data_type="float", initial_value=None):
+        """Handle of a tag of the fixed layout; unknown names raise KeyError."""
+        handle = self._handles.get(name)
+        if handle is None:
+            raise KeyError(f"Variabile {name} non presente nel layout del DataPool condiviso.")
+        if initial_value is not None:
+            self.set(handle, initial_value)
+        return handle
+
+    def read(self, handle):
+        """Consistent ``(value, timestamp, quality)`` of one tag."""
+        seq = self._seq
+        for _ in range(_MAX_READ_SPINS):
+            before = seq[handle]
+            if not before & 1:
+                value = self._column_of[handle][handle]
+                timestamp = self._timestamps[handle]
+                quality = self._quality[handle]
+                if seq[handle] == before:
+                    if not quality:
+                        value = None
+                    elif handle in self._bools:
+                        value = bool(value)
+                    return value, timestamp, quality
+        raise RuntimeError(f"Lettura della variabile {self._names[handle]} non coerente: scrittura interrotta?")
+
+    def get(self, handle):
+        return self.read(handle)[0]
+
+    def set(self, handle, value, quality=QUALITY_GOOD, timestamp=None):
+        seq = self._seq
+        seq[handle] += 1
+        try:
+            self._column_of[handle][handle] = value
+            self._timestamps[handle] = timestamp if timestamp is not None else time.time()
+            self._quality[handle] = quality
+        except (TypeError, OverflowError) as e:
+            raise self._type_error(handle, value, e) from None
+        finally:
+            seq[handle] += 1
+
+    def get_many(self, handles):
+        read = self.read
+        return [read(h)[0] for h in handles]
+
+    def set_many(self, handles, values, quality=QUALITY_GOOD, timestamp=None):
+        now = timestamp if timestamp is not None else time.time()
+        write = self.set
+        for h, value in zip(handles, values):
+            write(h, value, quality, now)
+
+    def _describe(self, handle):
+        value, timestamp, quality = self.read(handle)
+        return {
+            "address": self._addresses[handle],
+            "length": self._lengths[handle],
+            "type": self._types[handle],
+            "value": value,
+            "timestamp": timestamp,
+            "quality": quality,
+        }
+
+    def take_ownership(self):
+        """
+        Make this process the owner of the segment: it is removed when the
+        process exits, or by the resource tracker if the process dies.
+        """
+        if self.owner:
+            return
+        self.owner = True
+        if self.shm._name not in _owned_segments:
+            _owned_segments.add(self.shm._name)
+            resource_tracker.register(self.shm._name, "shared_memory")
+        atexit.register(self.close)
+        logger.info("DataPool condiviso %s di proprietà del processo %d.", self.shm.name, os.getpid())
+
+    def close(self, unlink=None):
+        """Detach from the segment; the owner also removes it unless ``unlink`` is False."""
+        self.stop_dispatcher()
+        self._column_of = []
+        for view in self._value_views + [self._values, self._seq, self._timestamps, self._quality]:
+            view.release()
+        self.shm.close()
+        if unlink is None:
+            unlink = self.owner
+        if unlink:
+            self.shm.unlink()
+            _owned_segments.discard(self.shm._name)
+        if self.owner:
+            atexit.unregister(self.close)
+
+def _aligned(offset):
+    return (offset + 7) & ~7
+
+def create_data_pool():
+    """
+    The process DataPool: on shared memory when ``shared_data_pool`` is
+    configured. The segment belongs to no process until one calls
+    ``take_ownership``, whatever the import order of the processes.
+    """
+    dispatch_interval = config_manager.get_float("datapool_dispatch_interval", 0.1)
+    shared = config_manager.get("shared_data_pool")
+    if shared:
+        # the supervisor takes ownership (startup.bootstrap); every other process just attaches
+        pool = SharedDataPool.open(shared.get("name", "vengine_datapool"), shared.get("tags", []))
+        pool.dispatch_interval = dispatch_interval
+        return pool
+    return DataPool(use_redis=False, dispatch_interval=dispatch_interval)
 
-data_pool = DataPool(use_redis=False)
\ No newline at end of file
+data_pool = create_data_pool()
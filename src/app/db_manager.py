@@ -1,43 +1,19 @@
-from sqlalchemy import Text, JSON
-from sqlalchemy import ForeignKey, Integer
 import threading
 import json
 import time
+from datetime import datetime
 from logging_config import logger
-from sqlalchemy import create_engine, Column, String, Integer, Float, Text
+from sqlalchemy import create_engine, text, Column, String, Integer, Float, Text, DateTime, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, scoped_session
-from alembic.config import Config
-from sqlalchemy import Column, Integer, String, DateTime
-from datetime import datetime
-
-class Audit(Base):
-    record_id = Column(Integer, ForeignKey('history.id'), nullable=True)
-    old_value = Column(String, nullable=True)
-    new_value = Column(String, nullable=True)
-    __tablename__ = 'audit'
-    id = Column(Integer, primary_key=True)
-    action = Column(String)
-    user = Column(String)
-    timestamp = Column(DateTime, default=datetime.utcnow)
-
+from sqlalchemy.exc import SQLAlchemyError
 from alembic import command
-from sqlalchemy import Column, Integer, String, DateTime
-from datetime import datetime
-
-class Audit(Base):
-    record_id = Column(Integer, ForeignKey('history.id'), nullable=True)
-    old_value = Column(String, nullable=True)
-    new_value = Column(String, nullable=True)
-    __tablename__ = 'audit'
-    id = Column(Integer, primary_key=True)
-    action = Column(String)
-    user = Column(String)
-    timestamp = Column(DateTime, default=datetime.utcnow)
-
+from alembic.config import Config
 from config_manager import config_manager
 from metrics_manager import metrics_manager
-from sqlalchemy.exc import SQLAlchemyError
+
+db_latency_histogram = metrics_manager.hot_histogram("db_operation_latency_seconds", "Latenza delle operazioni sul DB", ("operation",))
+_db_latency = {op: db_latency_histogram.labels(op) for op in ("save", "save_batch", "get", "history", "delete", "health")}
 
 Base = declarative_base()
 
@@ -53,69 +29,135 @@ class History(Base):
     timestamp = Column(Float)
     state = Column(Text)
 
-class DBManager:
-    def log_audit(self, action, user, record_id=None, old_json=None, new_json=None):(self, action, user, old_value=None, new_value=None):
-        session = self.Session()
-        session.add(Audit(action=action,user=user,record_id=record_id,old_json=old_json,new_json=new_json))(action=action, user=user, old_value=str(old_value), new_value=str(new_value)))
-        session.commit()
-    
-# Ensure index on audit.record_id
-self.engine.execute("CREATE INDEX IF NOT EXISTS idx_audit_record_id ON audit (record_id)")
-
-def health_check(self):
-        """Check DB connectivity and ensure history timestamp index exists"""
-        try:
-            session = self.Session()
-            session.execute('SELECT 1')
-            self.engine.execute("CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history (timestamp)")
-            session.close()
-            return True
-        except Exception as e:
-            logger.error(f"DB health check failed: {e}")
-            raise
-    def purge_history(self, days: int):
-        """Delete history entries older than given days."""
-        from datetime import datetime, timedelta
-        cutoff = datetime.utcnow() - timedelta(days=days)
-        session = self.Session()
-        session.query(self.History).filter(self.History.timestamp < cutoff).delete()
-        session.commit()
-        logger.info(f"Purged history older than {days} days")
-    def __init__(self, db_path="states.db"):
-        # Determine database URL and engine
-        db_url = config_manager.get("db_url", f"sqlite:///{db_path}")
-        engine_args = {"connect_args": {"check_same_thread": False}} if db_url.startswith("sqlite") else {}
-        self.engine = create_engine(db_url, **engine_args)
-        self.SessionLocal = scoped_session(sessionmaker(bind=self.engine))
+class Audit(Base):
+    __tablename__ = 'audit'
+    id = Column(Integer, primary_key=True)
+    record_id = Column(Integer, ForeignKey('history.id'), nullable=True)
+    old_value = Column(String, nullable=True)
+    new_value = Column(String, nullable=True)
+    action = Column(String)
+    user = Column(String)
+    timestamp = Column(DateTime, default=datetime.utcnow)
+
+# created once per database, after the migrations
+_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_audit_record_id ON audit (record_id)",
+    "CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history (timestamp)",
+)
 
-        # Record initial DB URL for metrics
-        metrics_manager.increment_counter("db_init_total")
+def default_db_url(db_path="states.db"):
+    return config_manager.get("db_url", f"sqlite:///{db_path}")
 
+class DatabaseService:
+    """
+    Process-wide registry of database engines: one pooled SQLAlchemy engine and
+    scoped session factory per URL, with the migrations run once per URL the
+    first time it is used (or explicitly at startup via ``migrate``).
+    """
+
+    def __init__(self):
+        self._engines = {}
+        self._migrated = set()
+        self.lock = threading.RLock()
+
+    def get(self, db_url):
+        """Return ``(engine, session_factory)`` for ``db_url``, creating and migrating it on first use."""
+        with self.lock:
+            entry = self._engines.get(db_url)
+            if entry is None:
+                engine = create_engine(db_url, **self._engine_args(db_url))
+                entry = self._engines[db_url] = (engine, scoped_session(sessionmaker(bind=engine)))
+                metrics_manager.increment_counter("db_init_total")
+                logger.info("Engine DB creato per %s", engine.url.render_as_string(hide_password=True))
+            if db_url not in self._migrated:
+                self._migrate(db_url, entry[0])
+            return entry
+
+    def migrate(self, db_url=None):
+        """Run the migrations for ``db_url`` (default: the configured URL) if not done yet."""
+        self.get(db_url or default_db_url())
+
+    def _engine_args(self, db_url):
+        if db_url.startswith("sqlite"):
+            return {"connect_args": {"check_same_thread": False}}
+        return {
+            "pool_size": config_manager.get_int("db_pool_size", 5),
+            "max_overflow": config_manager.get_int("db_max_overflow", 10),
+            "pool_recycle": config_manager.get_int("db_pool_recycle", 1800),
+            "pool_pre_ping": True,
+        }
+
+    def _migrate(self, db_url, engine):
         # Run migrations via Alembic; fallback to create_all
         alembic_cfg = Config(config_manager.get("alembic_config", "alembic.ini"))
+        alembic_cfg.set_main_option("sqlalchemy.url", db_url.replace("%", "%%"))
         start = time.time()
         try:
             command.upgrade(alembic_cfg, "head")
         except Exception:
-            Base.metadata.create_all(self.engine)
+            Base.metadata.create_all(engine)
         finally:
             duration = time.time() - start
             metrics_manager.observe_histogram("db_migration_latency_seconds", duration)
+        try:
+            with engine.begin() as conn:
+                for statement in _INDEXES:
+                    conn.execute(text(statement))
+        except SQLAlchemyError as e:
+            logger.error("Errore nella creazione degli indici: %s", e)
+        self._migrated.add(db_url)
+
+    def dispose(self):
+        """Close every pool, e.g. at process shutdown."""
+        with self.lock:
+            entries, self._engines = list(self._engines.values()), {}
+            self._migrated.clear()
+        for engine, session_factory in entries:
+            session_factory.remove()
+            engine.dispose()
+
+database_service = DatabaseService()
+
+class DBManager:
+    """
+    Block state store on top of the shared DatabaseService.
+
+    Creating a DBManager is cheap: the engine, pool and migrations of its URL
+    are shared process-wide. With a ``namespace`` (e.g. the engine id) keys are
+    stored as ``namespace:block`` so several engines can share one database;
+    a manager without namespace (e.g. the API) sees them under those keys.
+    Reads fall back to the un-prefixed key, so states saved before the
+    namespace was introduced are still restored.
+    """
 
+    State = State
+    History = History
+    Audit = Audit
+
+    def __init__(self, db_path="states.db", db_url=None, namespace=None):
+        self.db_url = db_url or default_db_url(db_path)
+        self.namespace = namespace
+        self._prefix = f"{namespace}:" if namespace else ""
+        self.engine, self.SessionLocal = database_service.get(self.db_url)
+        self.Session = self.SessionLocal
         self.lock = threading.Lock()
 
+    def _key(self, block_name):
+        return self._prefix + block_name
+
     def save_state(self, block_name, state):
         start = time.time()
         state_json = json.dumps(state)
+        key = self._key(block_name)
         session = self.SessionLocal()
         try:
-            obj = session.query(State).get(block_name)
+            obj = session.get(State, key)
             if obj:
                 obj.state = state_json
             else:
-                obj = State(block_name=block_name, state=state_json)
+                obj = State(block_name=key, state=state_json)
                 session.add(obj)
-            history = History(block_name=block_name, timestamp=time.time(), state=state_json)
+            history = History(block_name=key, timestamp=time.time(), state=state_json)
             session.add(history)
             session.commit()
         except Exception as e:
@@ -123,18 +165,56 @@ def health_check(self):
             logger.error("Errore nel salvataggio dello stato per %s: %s", block_name, e)
         finally:
             duration = time.time() - start
-            metrics_manager.observe_histogram("db_save_latency_seconds", duration)
+            _db_latency["save"].observe(duration)
+            session.close()
+
+    def save_states(self, states):
+        """
+        Persist several block states in a single transaction.
+        Returns True on commit, False if the batch was rolled back.
+        """
+        start = time.time()
+        session = self.SessionLocal()
+        try:
+            now = time.time()
+            keyed = {self._key(block_name): state for block_name, state in states.items()}
+            existing = {
+                obj.block_name: obj
+                for obj in session.query(State).filter(State.block_name.in_(list(keyed))).all()
+            }
+            for key, state in keyed.items():
+                state_json = json.dumps(state)
+                obj = existing.get(key)
+                if obj:
+                    obj.state = state_json
+                else:
+                    session.add(State(block_name=key, state=state_json))
+                session.add(History(block_name=key, timestamp=now, state=state_json))
+            session.commit()
+            return True
+        except Exception as e:
+            session.rollback()
+            logger.error("Errore nel salvataggio batch di %d stati: %s", len(states), e)
+            return False
+        finally:
+            duration = time.time() - start
+            _db_latency["save_batch"].observe(duration)
             session.close()
 
     def get_state(self, block_name):
         start = time.time()
         session = self.SessionLocal()
         try:
-            obj = session.query(State).get(block_name)
+            obj = session.get(State, self._key(block_name))
+            if obj is None and self._prefix:
+                # states saved before namespacing, until the block saves under its namespace
+                obj = session.get(State, block_name)
+                if obj is not None:
+                    logger.info("Stato di %s ripristinato dalla chiave senza namespace %s.", self._key(block_name), block_name)
             return json.loads(obj.state) if obj else None
         finally:
             duration = time.time() - start
-            metrics_manager.observe_histogram("db_get_latency_seconds", duration)
+            _db_latency["get"].observe(duration)
             session.close()
 
     def get_history(self, block_name):
@@ -142,20 +222,22 @@ def health_check(self):
         session = self.SessionLocal()
         try:
             rows = session.query(History) \
-                          .filter_by(block_name=block_name) \
+                          .filter_by(block_name=self._key(block_name)) \
                           .order_by(History.timestamp) \
                           .all()
             return [(row.timestamp, json.loads(row.state)) for row in rows]
         finally:
             duration = time.time() - start
-            metrics_manager.observe_histogram("db_history_latency_seconds", duration)
+            _db_latency["history"].observe(duration)
             session.close()
 
     def get_all_keys(self):
         session = self.SessionLocal()
         try:
-            rows = session.query(State.block_name).all()
-            return {row[0] for row in rows}
+            query = session.query(State.block_name)
+            if self._prefix:
+                query = query.filter(State.block_name.startswith(self._prefix, autoescape=True))
+            return {row[0][len(self._prefix):] for row in query.all()}
         finally:
             session.close()
 
@@ -163,25 +245,40 @@ def health_check(self):
         start = time.time()
         session = self.SessionLocal()
         try:
-            session.query(State).filter_by(block_name=block_name).delete()
+            session.query(State).filter_by(block_name=self._key(block_name)).delete()
             session.commit()
         except Exception as e:
             session.rollback()
             logger.error("Errore nella cancellazione dello stato per %s: %s", block_name, e)
         finally:
             duration = time.time() - start
-            metrics_manager.observe_histogram("db_delete_latency_seconds", duration)
+            _db_latency["delete"].observe(duration)
             session.close()
 
-    def close(self):
-        self.SessionLocal.remove()
-        self.engine.dispose()
+    def log_audit(self, action, user, record_id=None, old_value=None, new_value=None):
+        session = self.SessionLocal()
+        try:
+            session.add(Audit(action=action, user=user, record_id=record_id,
+                              old_value=str(old_value), new_value=str(new_value)))
+            session.commit()
+        finally:
+            session.close()
 
-    
-# Ensure index on audit.record_id
-self.engine.execute("CREATE INDEX IF NOT EXISTS idx_audit_record_id ON audit (record_id)")
+    def purge_history(self, days: int):
+        """Delete history entries older than given days."""
+        cutoff = time.time() - days * 86400
+        session = self.SessionLocal()
+        try:
+            query = session.query(History).filter(History.timestamp < cutoff)
+            if self._prefix:
+                query = query.filter(History.block_name.startswith(self._prefix, autoescape=True))
+            query.delete(synchronize_session=False)
+            session.commit()
+        finally:
+            session.close()
+        logger.info(f"Purged history older than {days} days")
 
-def health_check(self):
+    def health_check(self):
         """
         Check database connectivity and latency.
         Returns True if healthy, False otherwise.
@@ -189,18 +286,31 @@ def health_check(self):
         session = self.SessionLocal()
         start = time.time()
         try:
-            session.execute("SELECT 1")
+            session.execute(text("SELECT 1"))
             healthy = True
         except SQLAlchemyError as e:
             logger.error("DB health check failed: %s", e)
             healthy = False
         finally:
             duration = time.time() - start
-            metrics_manager.observe_histogram("db_health_latency_seconds", duration)
+            _db_latency["health"].observe(duration)
             metrics_manager.increment_counter("db_health_total")
             session.close()
         return healthy
 
+    def close(self):
+        # the engine and its pool are shared: only drop this thread's session
+        self.SessionLocal.remove()
+
+_shared_manager = None
+
+def get_db_manager():
+    """DBManager on the configured database, shared by the API request handlers."""
+    global _shared_manager
+    if _shared_manager is None:
+        _shared_manager = DBManager(config_manager.get("db_path", "states.db"))
+    return _shared_manager
+
 if __name__ == '__main__':
     # Esempio di test per il DBManager
     dbm = DBManager("states.db")
@@ -208,4 +318,4 @@ if __name__ == '__main__':
     print("Stato di block1:", dbm.get_state("block1"))
     print("Tutti i blocchi:", dbm.get_all_keys())
     dbm.delete_state("block1")
-    dbm.close()
\ No newline at end of file
+    dbm.close()
@@ -3,7 +3,6 @@ import subprocess
 import time
 from prometheus_client import Gauge
 
-from app.config_manager import config_manager
 import asyncio
 import os
 import importlib.util
@@ -28,18 +27,11 @@ def safe_load_logic(func):
         try:
             return func(filepath)
         except Exception as e:
-            # Track failures and disable module if too many
-            name = module_name
-            self.failure_counts[name] = self.failure_counts.get(name, 0) + 1
-                self.failure_timestamps[name] = time.time()
-            if self.failure_counts[name] >= self.MAX_FAILURES:
-                self.failure_timestamps[name] = time.time()
-                logger.error(f"Disabilito il modulo {name} dopo {self.MAX_FAILURES} fallimenti consecutivi")
-                continue  # skip further loading of this module
             logger.exception("Modulo %s disabilitato a causa di un errore inatteso: %s", filepath, e)
             metrics_manager.increment_counter("dynamic_loader_unexpected_failures_total")
-            _disabled_modules.add(filepath)
-            _disable_timestamps[filepath] = time.time()
+            with _cache_lock:
+                _disabled_modules.add(filepath)
+                _disable_timestamps[filepath] = time.time()
             return {}
     return wrapper
 
@@ -2,12 +2,24 @@ from abc import ABC, abstractmethod
 
 class LogicBlock(ABC):
     """Base class for dynamic logic blocks."""
+    # DataPool variables read and written by the block, used to order execution
+    reads = ()
+    writes = ()
 
     @abstractmethod
     def execute(self, context):
-        """Execute the logic block with given context."""
+        """
+        Execute the logic block with given context: the engine's ProcessImage,
+        holding the inputs snapshotted at cycle start and staging the outputs.
+        """
         pass
 
+    def on_pause(self):
+        """Called when the engine is paused, e.g. to stop polling drivers."""
+
+    def on_resume(self):
+        """Called when the engine resumes."""
+
 # Existing dynamic logic classes below can inherit from LogicBlock
 
 import asyncio
@@ -15,6 +27,7 @@ from global_context import global_data_pool
 
 class MyBlock:
     version = "1.0"
+    reads = ("profinet_value",)
     def __init__(self, name):
         self.name = name
         self.counter = 0
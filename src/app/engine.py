@@ -1,26 +1,32 @@
-import time
-from prometheus_client import Counter, Histogram
-
-engine_subtask_duration = Histogram('engine_subtask_duration_seconds', 'Duration of engine subtasks')
-engine_cycles = Counter('engine_cycles_total', 'Total engine cycles')
-import time
-from prometheus_client import Counter, Histogram
-
-engine_cycles_total = Counter('engine_cycles_total', 'Total engine cycles')
-engine_cycle_duration = Histogram('engine_cycle_duration_seconds', 'Engine cycle duration')
-from opentelemetry import trace
-from opentelemetry.instrumentation.asyncio import AsyncInstrumentor
-
-AsyncInstrumentor().instrument()
 import asyncio
 import time
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dynamic_loader import load_logic_module
 from logging_config import logger
 from config_manager import config_manager
 from db_manager import DBManager
 from metrics_manager import metrics_manager
-from app.advanced_cluster_manager import broadcast_state
+from state_persistence import StatePersister, StateChangeTracker
+from logic_watcher import logic_watcher
+from cycle_scheduler import DeadlineScheduler, cycle_jitter_histogram
+from cpu_placement import apply_placement, engine_spec
+from task_classes import TaskClassScheduler
+from block_watchdog import BlockWatchdog
+from cycle_trace import CycleTraceRecorder
+from engine_clock import default_clock
+from block_executor import BlockExecutionPolicy, INLINE, PROCESS, timed_execute
+from process_executor import ProcessBlock
+from process_image import ProcessImage, takes_context
+from execution_plan import block_io
+from advanced_cluster_manager import broadcast_state
+
+# hot-path metrics: handles are resolved once per engine/block, observations are lock-free
+block_exec_histogram = metrics_manager.hot_histogram("engine_block_exec_time_seconds", "Tempo di esecuzione dei blocchi", ("engine", "block"))
+cycle_time_histogram = metrics_manager.hot_histogram("engine_cycle_time_seconds", "Durata dei cicli dell'engine", ("engine",))
+state_writes_counter = metrics_manager.hot_counter("engine_state_writes_total", "Stati dei blocchi scritti", ("engine",))
+state_writes_suppressed_counter = metrics_manager.hot_counter("engine_state_writes_suppressed_total", "Scritture di stato evitate perché invariate", ("engine",))
+block_deferred_counter = metrics_manager.hot_counter("engine_block_deferred_total", "Esecuzioni saltate perché il run precedente è ancora attivo", ("engine", "block"))
 
 try:
     import uvloop
@@ -33,29 +39,131 @@ class DefaultScheduler:
     """
     Default scheduler to compute delay between cycles based on cycle_time.
     """
+    def __init__(self, cycle_time, clock=None, engine_id="engine"):
         self.cycle_time = cycle_time
+        self.clock = clock or default_clock
+        self.last_jitter = 0.0
+        self._jitter = cycle_jitter_histogram.labels(engine=engine_id)
+
+    def reset(self):
+        pass
 
     async def get_delay(self, cycle_start, cycle_duration):
         delay = self.cycle_time - cycle_duration
         return delay if delay > 0 else 0
 
+    async def wait_for_next_cycle(self, cycle_start, cycle_duration):
+        delay = await self.get_delay(cycle_start, cycle_duration)
+        if delay:
+            wake_at = self.clock.monotonic() + delay
+            await self.clock.sleep(delay)
+            # wake-up lateness, comparable with the deadline scheduler jitter
+            self.last_jitter = self.clock.monotonic() - wake_at
+            self._jitter.observe(self.last_jitter)
+        else:
+            # an overrunning cycle of inline blocks never awaited: let stop/pause, the API and other engines run
+            await asyncio.sleep(0)
+
 class FastAsyncEngine:
-    def __init__(self, config_manager=None):
-        # Initialize engine with config values
-        self.config = config_manager or config_manager.ConfigManager()
-        self.cycle_time = self.config.config.get('engine', {}).get('cycle_time', 0.01)
-        self.timeout = self.config.config.get('engine', {}).get('timeout', 0.005)
+    def __init__(self, logic_filepath="dynamic_logic_classes.py", cycle_time=None, db_path="states.db",
+                 scheduler=None, execution_timeout=None, engine_id="engine", clock=None, driver_manager=None,
+                 db_url=None):
+        self.engine_id = engine_id
+        # I/O drivers whose polling follows the engine's pause/resume, if any
+        self.driver_manager = driver_manager
+        # injectable time source: a VirtualClock runs simulated cycles back to back
+        self.clock = clock or default_clock
+        # simulation mode runs blocks one at a time in plan order
+        self.deterministic = False
         # externalize cycle_time and execution timeout
         self.cycle_time = cycle_time if cycle_time is not None else config_manager.get_float("cycle_time", 0.005)
         self.execution_timeout = execution_timeout if execution_timeout is not None else config_manager.get_float("execution_timeout", self.cycle_time)
-        # inject or default scheduler
-        self.scheduler = scheduler if scheduler is not None else DefaultScheduler(self.cycle_time)
+        # inject or default scheduler; "deadline" mode compensates drift and exports jitter
+        if scheduler is None:
+            if config_manager.get("scheduler_mode", "default") == "deadline":
+                scheduler = DeadlineScheduler(
+                    self.cycle_time,
+                    overrun_policy=config_manager.get("scheduler_overrun_policy", "skip"),
+                    spin_threshold=config_manager.get_float("scheduler_spin_threshold", 0.0005),
+                    engine_id=engine_id,
+                    clock=self.clock,
+                )
+            else:
+                scheduler = DefaultScheduler(self.cycle_time, clock=self.clock, engine_id=engine_id)
+        self.scheduler = scheduler
         self.logic_filepath = logic_filepath
+        # set by the shared file watcher; checked once per cycle instead of stat-ing the logic file
+        self._reload_flag = logic_watcher.watch(logic_filepath)
         self.blocks = {}
+        # task classes with their cached dependency-ordered plans, rebuilt only by reload_logic
+        self.task_classes = TaskClassScheduler(
+            self.cycle_time,
+            classes_config=config_manager.get("task_classes", {}),
+            assignments=config_manager.get("block_task_classes", {}),
+            default_timeout=self.execution_timeout,
+            engine_id=engine_id,
+        )
+        self._tick = 0
+        # per-block budgets: only the offending block is cancelled, deferred or quarantined
+        self.watchdog = BlockWatchdog(
+            budgets=config_manager.get("block_budgets", {}),
+            max_overruns=config_manager.get_int("block_max_overruns", 3),
+            quarantine_cycles=config_manager.get_int("block_quarantine_cycles", 1000),
+            engine_id=engine_id,
+        )
+        self._deferred = {}
+        # inputs snapshotted at cycle start, outputs staged and committed at cycle end
+        self.process_image = ProcessImage()
+        self._execute_args = {}
+        # sync blocks run inline when measured fast, otherwise on a dedicated pool
+        self.execution_policy = BlockExecutionPolicy(
+            inline_threshold=config_manager.get_float("block_inline_threshold", 0.0001),
+            overrides=config_manager.get("block_execution_modes", {}),
+        )
+        # block threads follow the engine's cpu_placement entry, if any
+        placement = engine_spec(engine_id)
+        self.block_executor = ThreadPoolExecutor(
+            max_workers=config_manager.get_int("block_thread_workers", config_manager.get_int("max_workers", 4)),
+            thread_name_prefix=f"blocks-{engine_id}",
+            initializer=apply_placement if placement else None,
+            initargs=(f"{engine_id}-blocks", placement) if placement else (),
+        )
         self.last_modified = None
-        self.last_cycle_timestamp = time.time()
+        self.last_cycle_timestamp = self.clock.time()
+        self.cycles = 0
+        # perf_counter timestamp of the first completed cycle, for the startup profile
+        self.first_cycle_at = None
         self.running = False
-        self.db = DBManager(db_path)
+        # a paused engine parks its loop on this event: no cycles, no timer wake-ups
+        self.paused = False
+        self._resume_event = asyncio.Event()
+        self._resume_event.set()
+        # set whenever no cycle is in progress, so that pause can wait for the current one
+        self._idle = asyncio.Event()
+        self._idle.set()
+        # token of the pause still waiting for the current cycle; a resume meanwhile withdraws it
+        self._pausing = None
+        # the configured db_url or db_path is shared by every engine of the process (EngineManager passes
+        # the same path to all of them): block states go in the engine's namespace. An explicit db_url is
+        # the engine's own database
+        self.db = DBManager(db_path, db_url=db_url, namespace=engine_id if db_url is None else None)
+        # write-behind persistence: blocks mark their state dirty, a background flusher batches the writes
+        self.persister = StatePersister(self.db, flush_interval=config_manager.get_float("state_flush_interval", 0.1))
+        # change detection: unchanged states are not persisted, historized or broadcast
+        self.change_tracker = StateChangeTracker()
+        # authoritative in-memory state per block; broadcasts carry only the blocks changed since the last one
+        self.state_snapshot = {}
+        self._changed_blocks = set()
+        self._cycle_time_metric = cycle_time_histogram.labels(engine_id)
+        self._state_writes = state_writes_counter.labels(engine_id)
+        self._state_writes_suppressed = state_writes_suppressed_counter.labels(engine_id)
+        self._exec_time_metrics = {}
+        # always-on timeline of the last cycles, dumped as Chrome trace when a cycle overruns
+        self.trace = CycleTraceRecorder(capacity=config_manager.get_int("trace_capacity_cycles", 100), engine_id=engine_id)
+        self.persister.trace = self.trace
+        self.trace_dump_dir = config_manager.get("trace_dump_dir", "traces")
+        self.trace_dump_interval = config_manager.get_float("trace_dump_interval", 60.0)
+        self._last_trace_dump = 0.0
 
     async def reload_logic(self):
         try:
@@ -65,14 +173,17 @@ class FastAsyncEngine:
             return
         if self.last_modified is None or modified > self.last_modified:
             logger.info("Reload della logica in corso...")
-            # save state of existing blocks
+            # save state of existing blocks and flush so the restore below reads it back
             for name, block in self.blocks.items():
                 if hasattr(block, "get_state"):
                     try:
                         state = block.get_state()
-                        self.db.save_state(name, state)
+                        if self.change_tracker.has_changed(name, state):
+                            self.persister.mark_dirty(name, state)
+                            self.state_snapshot[name] = state
                     except Exception as e:
                         logger.error("Errore nel salvataggio dello stato di %s: %s", name, e)
+            await asyncio.to_thread(self.persister.flush)
             # load new logic
             new_blocks = await asyncio.get_event_loop().run_in_executor(None, load_logic_module, self.logic_filepath)
             # restore state
@@ -81,85 +192,305 @@ class FastAsyncEngine:
                 if saved_state and hasattr(block, "set_state"):
                     try:
                         block.set_state(saved_state)
+                        self.change_tracker.remember(name, saved_state)
+                        self.state_snapshot[name] = saved_state
                     except Exception as e:
                         logger.error("Errore nel ripristino dello stato di %s: %s", name, e)
+            # move CPU-bound blocks to their worker processes, starting from the restored state
+            new_blocks = await asyncio.to_thread(self._start_process_blocks, new_blocks)
             # cleanup obsolete states
             current_keys_in_db = self.db.get_all_keys()
             current_keys_in_code = set(new_blocks.keys())
             for key in current_keys_in_db - current_keys_in_code:
+                self.persister.discard(key)
+                self.change_tracker.forget(key)
                 self.db.delete_state(key)
                 logger.info("Stato per il blocco '%s' rimosso.", key)
-            self.blocks = new_blocks
+            for key in set(self.state_snapshot) - current_keys_in_code:
+                self.execution_policy.forget(key)
+                self.watchdog.forget(key)
+                self._exec_time_metrics.pop(key, None)
+                block_exec_histogram.remove(self.engine_id, key)
+                self.state_snapshot.pop(key, None)
+                self._changed_blocks.discard(key)
+            old_blocks, self.blocks = self.blocks, new_blocks
+            await asyncio.to_thread(self._stop_process_blocks, old_blocks)
+            self.task_classes.rebuild(new_blocks)
+            self._execute_args = {}
+            self.process_image.set_inputs(set().union(*(block_io(block)[0] for block in new_blocks.values())))
+            for task_class in self.task_classes.classes.values():
+                for stage in task_class.plan.stages:
+                    for name, block in stage:
+                        self.watchdog.set_budget(name, block, default=task_class.timeout)
             self.last_modified = modified
+            metrics_manager.record_metric("engine_blocks", len(new_blocks))
             logger.info("Reload completato: %s", list(new_blocks.keys()))
             broadcast_state({"reload": list(new_blocks.keys())})
 
+    def _start_process_blocks(self, blocks):
+        started = dict(blocks)
+        for name, block in blocks.items():
+            if self.execution_policy.mode(name, block) != PROCESS:
+                continue
+            try:
+                started[name] = ProcessBlock(name, block, self.logic_filepath)
+            except Exception as e:
+                logger.error("Avvio del worker per il blocco %s fallito, esecuzione in-process: %s", name, e)
+        return started
+
+    def _stop_process_blocks(self, blocks):
+        for block in blocks.values():
+            if isinstance(block, ProcessBlock):
+                block.close()
+
+    def _args_of(self, name, block):
+        args = self._execute_args.get(name)
+        if args is None:
+            args = self._execute_args[name] = (self.process_image,) if takes_context(block) else ()
+        return args
+
     async def execute_block(self, name, block):
-        start_time = time.time()
+        deferred = self._deferred.get(name)
+        if deferred is not None:
+            if not deferred.done():
+                # a previous run is still busy in its worker: skip this cycle instead of piling up
+                block_deferred_counter.labels(self.engine_id, name).inc()
+                return None
+            del self._deferred[name]
+            deferred.exception()
+        if self.watchdog.is_quarantined(name, self._tick):
+            return None
+        budget = self.watchdog.budget_of(name)
+        start_time = self.clock.monotonic()
+        start_ns = time.perf_counter_ns()
         try:
             if asyncio.iscoroutinefunction(block.execute):
-                await block.execute()
+                await asyncio.wait_for(block.execute(*self._args_of(name, block)), budget)
+                exec_time = self.clock.monotonic() - start_time
             else:
-                await asyncio.to_thread(block.execute)
+                if self.execution_policy.mode(name, block) == INLINE:
+                    exec_time = timed_execute(block, *self._args_of(name, block))
+                else:
+                    loop = asyncio.get_running_loop()
+                    future = loop.run_in_executor(self.block_executor, timed_execute, block, *self._args_of(name, block))
+                    try:
+                        exec_time = await asyncio.wait_for(asyncio.shield(future), budget)
+                    except asyncio.TimeoutError:
+                        self._deferred[name] = future
+                        raise
+                self.execution_policy.record(name, exec_time)
+        except asyncio.TimeoutError:
+            self.watchdog.record_timeout(name, self._tick)
+            logger.warning("Blocco %s oltre il budget di %ss.", name, budget)
+            return None
         except Exception as e:
             logger.error("Errore nell'esecuzione del blocco %s: %s", name, e)
             return None
-        exec_time = time.time() - start_time
-        metrics_manager.observe_histogram(f"{name}_exec_time_seconds", exec_time)
+        finally:
+            self.trace.span(name, start_ns, time.perf_counter_ns(), "block", self.trace.block_lane(name))
+        self.watchdog.record(name, exec_time, self._tick)
+        self._complete_block(name, block, exec_time)
+        return exec_time
+
+    def _run_inline_batch(self, batch):
+        """Run fast synchronous blocks back to back in a single loop callback."""
+        for name, block in batch:
+            if self.watchdog.is_quarantined(name, self._tick):
+                continue
+            start_ns = time.perf_counter_ns()
+            try:
+                exec_time = timed_execute(block, *self._args_of(name, block))
+            except Exception as e:
+                logger.error("Errore nell'esecuzione del blocco %s: %s", name, e)
+                continue
+            finally:
+                self.trace.span(name, start_ns, time.perf_counter_ns(), "inline", self.trace.block_lane(name))
+            self.execution_policy.record(name, exec_time)
+            self.watchdog.record(name, exec_time, self._tick)
+            self._complete_block(name, block, exec_time)
+
+    def _complete_block(self, name, block, exec_time):
+        exec_time_metric = self._exec_time_metrics.get(name)
+        if exec_time_metric is None:
+            exec_time_metric = self._exec_time_metrics[name] = block_exec_histogram.labels(self.engine_id, name)
+        exec_time_metric.observe(exec_time)
         if hasattr(block, "get_state"):
+            start_ns = time.perf_counter_ns()
             try:
                 state = block.get_state()
-                self.db.save_state(name, state)
+                if self.change_tracker.has_changed(name, state):
+                    self.persister.mark_dirty(name, state)
+                    self.state_snapshot[name] = state
+                    self._changed_blocks.add(name)
+                    self._state_writes.inc()
+                else:
+                    self._state_writes_suppressed.inc()
             except Exception as e:
                 logger.error("Errore nel salvataggio post-esecuzione di %s: %s", name, e)
-        return exec_time
+            self.trace.span("state", start_ns, time.perf_counter_ns(), "persistence", self.trace.block_lane(name))
+
+    async def _run_plan(self, plan):
+        if self.deterministic:
+            for stage in plan.stages:
+                for name, block in stage:
+                    await self.execute_block(name, block)
+            return
+        for stage in plan.stages:
+            inline = []
+            others = []
+            for name, block in stage:
+                if not asyncio.iscoroutinefunction(block.execute) and self.execution_policy.mode(name, block) == INLINE:
+                    inline.append((name, block))
+                else:
+                    others.append((name, block))
+            if inline:
+                self._run_inline_batch(inline)
+            if len(others) == 1:
+                name, block = others[0]
+                await self.execute_block(name, block)
+            elif others:
+                await asyncio.gather(*(self.execute_block(name, block) for name, block in others))
 
     async def run_cycle(self):
-        start_all = time.time()
-        start = time.time()
-        start = time.time()
-        # Record backlog length metric
-        from app.metrics_manager import backlog_gauge
-        backlog_gauge.set(len(self.loader.logic_blocks))
-        from app.metrics_manager import success_counter
-        await self.reload_logic()
-        tasks = [asyncio.create_task(self.execute_block(name, block)) for name, block in self.blocks.items()]
+        start_ns = time.perf_counter_ns()
+        if self._reload_flag.is_set():
+            self._reload_flag.clear()
+            await self.reload_logic()
+        self.trace.span("reload_check", start_ns, time.perf_counter_ns())
+        start_ns = time.perf_counter_ns()
+        self.process_image.refresh()
+        self.trace.span("inputs", start_ns, time.perf_counter_ns(), "io")
+        for task_class in self.task_classes.due(self._tick):
+            start = time.perf_counter()
+            try:
+                await self._run_plan(task_class.plan)
+            except Exception as e:
+                logger.error("Errore nella classe %s: %s", task_class.name, e)
+            task_class.record(time.perf_counter() - start)
+        start_ns = time.perf_counter_ns()
         try:
-            await asyncio.wait_for(asyncio.gather(*tasks), timeout=self.execution_timeout)
+            self.process_image.commit()
+            # subscriber callbacks run on the pool's dispatcher thread, off the loop
+            self.process_image.pool.request_dispatch()
         except Exception as e:
-            logger.error("Timeout o errore in run_cycle: %s", e)
+            logger.error("Errore nella scrittura delle uscite del ciclo: %s", e)
+        self.trace.span("outputs", start_ns, time.perf_counter_ns(), "io")
+        self._tick += 1
+        if not self._changed_blocks:
+            return
+        start_ns = time.perf_counter_ns()
+        delta = {name: self.state_snapshot[name] for name in self._changed_blocks}
+        self._changed_blocks.clear()
         try:
-            current_state = {name: self.db.get_state(name) for name in self.db.get_all_keys()}
-            broadcast_state(current_state)
+            broadcast_state(delta)
         except Exception as e:
             logger.error("Errore nella comunicazione col cluster: %s", e)
+        self.trace.span("broadcast", start_ns, time.perf_counter_ns(), "cluster")
 
-    async def run(self):
-        start_all = time.time()
-        start = time.time()
-        start = time.time()
-        # Record backlog length metric
-        from app.metrics_manager import backlog_gauge
-        backlog_gauge.set(len(self.loader.logic_blocks))
-        from app.metrics_manager import success_counter
+    async def run(self, max_cycles=None):
         self.running = True
+        self.persister.start()
         logger.info("FastAsyncEngine avviato.")
         while self.running:
-            cycle_start = time.time()
+            if not self._resume_event.is_set():
+                await self._resume_event.wait()
+                if not self.running:
+                    break
+                # start a fresh schedule instead of catching up the paused time
+                self.scheduler.reset()
+            cycle_start = self.clock.monotonic()
+            self.trace.begin_cycle(self._tick)
+            start_ns = time.perf_counter_ns()
+            self._idle.clear()
             try:
                 await self.run_cycle()
             except Exception as e:
                 logger.error("Errore nel ciclo: %s", e)
-            cycle_duration = time.time() - cycle_start
-            metrics_manager.record_metric("cycle_time", cycle_duration)
-            self.last_cycle_timestamp = time.time()
-            delay = await self.scheduler.get_delay(cycle_start, cycle_duration)
-            if delay:
-                await asyncio.sleep(delay)
+            finally:
+                self._idle.set()
+            self.trace.span("cycle", start_ns, time.perf_counter_ns())
+            cycle_duration = self.clock.monotonic() - cycle_start
+            if cycle_duration > self.cycle_time:
+                self._dump_trace_on_overrun()
+            self._cycle_time_metric.observe(cycle_duration)
+            self.last_cycle_timestamp = self.clock.time()
+            self.cycles += 1
+            if self.first_cycle_at is None:
+                self.first_cycle_at = time.perf_counter()
+            if max_cycles is not None and self.cycles >= max_cycles:
+                break
+            await self.scheduler.wait_for_next_cycle(cycle_start, cycle_duration)
         logger.info("FastAsyncEngine fermato.")
 
+    def _dump_trace_on_overrun(self):
+        now = time.time()
+        if not self.trace_dump_dir or now - self._last_trace_dump < self.trace_dump_interval:
+            return
+        self._last_trace_dump = now
+        path = os.path.join(self.trace_dump_dir, f"trace_{self.engine_id}_{int(now * 1000)}.json")
+        # snapshot on the loop, write the file off it
+        asyncio.get_running_loop().run_in_executor(None, self.trace.dump, path, self.trace.export())
+
+    def _notify_blocks(self, hook):
+        for name, block in list(self.blocks.items()):
+            callback = getattr(block, hook, None)
+            if callback is None:
+                continue
+            try:
+                callback()
+            except Exception as e:
+                logger.error("Errore in %s del blocco %s: %s", hook, name, e)
+
+    async def pause(self):
+        """
+        Suspend the engine without tearing it down: the cycle loop parks after the
+        current cycle, which pause waits for, then the driver manager stops
+        polling, blocks get ``on_pause`` and the persister flushes the states of
+        that last cycle and stops its thread. Block state stays in memory.
+        A resume while pause is still waiting cancels it.
+        """
+        if self.paused:
+            return
+        self.paused = True
+        self._resume_event.clear()
+        token = self._pausing = object()
+        await self._idle.wait()
+        if self._pausing is not token:
+            return
+        self._pausing = None
+        if self.driver_manager is not None:
+            self.driver_manager.pause()
+        self._notify_blocks("on_pause")
+        await asyncio.to_thread(self.persister.stop)
+        logger.info("Engine %s in pausa.", self.engine_id)
+
+    async def resume(self):
+        if not self.paused:
+            return
+        self.paused = False
+        if self._pausing is not None:
+            # the pause never took effect: nothing to undo
+            self._pausing = None
+            self._resume_event.set()
+            return
+        if self.running:
+            self.persister.start()
+        if self.driver_manager is not None:
+            self.driver_manager.resume()
+        self._notify_blocks("on_resume")
+        self._resume_event.set()
+        logger.info("Engine %s ripreso.", self.engine_id)
+
     async def stop(self):
         self.running = False
+        # wake a paused loop so that it can exit
+        self._resume_event.set()
+        logic_watcher.unwatch(self.logic_filepath, self._reload_flag)
+        # graceful shutdown: let the current cycle finish, then flush its states before releasing the DB
+        await self._idle.wait()
+        await asyncio.to_thread(self.persister.stop)
+        self.block_executor.shutdown(wait=False)
+        await asyncio.to_thread(self._stop_process_blocks, self.blocks)
         self.db.close()
         logger.info("FastAsyncEngine stoppato.")
 
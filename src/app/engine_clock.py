@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+class MonotonicClock:
+    """Real time: monotonic seconds for scheduling, wall-clock seconds for timestamps."""
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def time(self):
+        return time.time()
+
+    async def sleep(self, delay):
+        await asyncio.sleep(delay)
+
+    async def sleep_until(self, deadline, spin_threshold=0.0):
+        """Sleep on the loop until ``spin_threshold`` before the deadline, then spin (yielding) to it."""
+        remaining = deadline - time.monotonic()
+        if remaining > spin_threshold:
+            await asyncio.sleep(remaining - spin_threshold)
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0)
+
+class VirtualClock:
+    """
+    Simulated time that only moves when someone sleeps.
+
+    sleep() advances the clock by the requested delay and just yields to the
+    loop, so cycles scheduled against it run back to back.
+    """
+
+    def __init__(self, start=0.0, epoch=0.0):
+        self._now = start
+        self.epoch = epoch
+
+    def monotonic(self):
+        return self._now
+
+    def time(self):
+        return self.epoch + self._now
+
+    def advance(self, delay):
+        if delay > 0:
+            self._now += delay
+
+    async def sleep(self, delay):
+        self.advance(delay)
+        await asyncio.sleep(0)
+
+    async def sleep_until(self, deadline, spin_threshold=0.0):
+        self.advance(deadline - self._now)
+        await asyncio.sleep(0)
+
+default_clock = MonotonicClock()
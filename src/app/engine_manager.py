@@ -1,15 +1,21 @@
 import asyncio
+import os
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from logging_config import logger
 from engine import FastAsyncEngine  # Assicurati di avere il modulo engine.py implementato
 from config_manager import config_manager
+from metrics_manager import metrics_manager
+from startup import startup_profile
+from engine_worker import EngineWorker
+from global_context import global_driver_manager
+from cpu_placement import apply_placement, applied_placements, engine_loop_spec, pin_housekeeping_thread
 
 class EngineInstance:
     def __init__(self, engine_id, logic_filepath, cycle_time, db_path):
         self.engine_id = engine_id
-        self.engine = FastAsyncEngine(logic_filepath, cycle_time, db_path)
+        self.engine = FastAsyncEngine(logic_filepath, cycle_time, db_path, engine_id=engine_id)
         self.task = None  # Riferimento all'asyncio.Task in cui viene eseguito l'engine
-        self.paused = False
 
     async def start(self):
         logger.info("Avvio engine %s", self.engine_id)
@@ -19,68 +25,271 @@ class EngineInstance:
         logger.info("Fermo engine %s", self.engine_id)
         await self.engine.stop()
         if self.task:
-            self.task.cancel()
+            # the loop exits by itself once the engine is stopped
+            try:
+                await self.task
+            except Exception as e:
+                logger.error("Errore nel loop dell'engine %s: %s", self.engine_id, e)
+
+    @property
+    def paused(self):
+        return self.engine.paused
 
     async def pause(self):
         logger.info("Metto in pausa engine %s", self.engine_id)
-        # Implementazione base della pausa: qui puoi inserire logica specifica per sospendere le operazioni
-        self.paused = True
+        await self.engine.pause()
 
     async def resume(self):
         logger.info("Riprendo engine %s", self.engine_id)
-        # Implementazione base della ripresa: qui puoi ripristinare le operazioni sospese
-        self.paused = False
+        await self.engine.resume()
 
     def status(self):
         return {
             "engine_id": self.engine_id,
             "running": self.engine.running,
             "paused": self.paused,
-            "last_cycle": self.engine.last_cycle_timestamp
+            "last_cycle": self.engine.last_cycle_timestamp,
+            "blocks": self.engine.watchdog.report(),
+            "cpu_placement": dict(applied_placements),
+            "jitter": getattr(self.engine.scheduler, "last_jitter", None),
         }
 
+def configured_workers():
+    """Number of engine worker processes: ``engine_workers`` (an int or "auto" for one per core), 0 = in-process."""
+    value = config_manager.get("engine_workers", 0)
+    if value == "auto":
+        return os.cpu_count() or 1
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        logger.warning("Valore engine_workers non valido: %s, uso la modalità in-process", value)
+        return 0
+
 class EngineManager:
-    def __init__(self):
+    """
+    Registry of the running engines.
+
+    With ``workers=0`` engines run as tasks on the caller's loop. Otherwise they
+    are placed on a pool of worker processes (each running an in-process
+    EngineManager on its own loop) on the least loaded worker, load being the
+    cycles per second of its engines; commands go through IPC and a supervisor
+    restarts crashed workers and re-creates their engines, which restore their
+    state from the DB. Workers start on first use.
+
+    The driver manager is shared by the in-process engines: its drivers are
+    paused while every engine is paused, and resume with the first engine.
+    """
+
+    def __init__(self, workers=None, start_method=None, pin_loop=True, driver_manager=global_driver_manager):
         self.engines = {}
+        self.driver_manager = driver_manager
+        # in-process mode: pin the loop thread (cpu_placement.engine_loop) when the first engine starts;
+        # the threads it starts (persister, Redis mirror, loop executor) move to the housekeeping cores
+        self.pin_loop = pin_loop
         self.lock = threading.Lock()
+        if workers is None:
+            workers = configured_workers()
+        self.workers = [EngineWorker(i, start_method) for i in range(workers)]
+        # engine_id -> {"worker": index, "args": add_engine args, "paused": bool}
+        self.placements = {}
+        self.supervise_interval = config_manager.get_float("engine_worker_supervise_interval", 1.0)
+        self._supervisor = None
+
+    @property
+    def multiprocess(self):
+        return bool(self.workers)
+
+    def _sync_drivers(self):
+        if self.driver_manager is None:
+            return
+        with self.lock:
+            all_paused = bool(self.engines) and all(inst.paused for inst in self.engines.values())
+        if all_paused and not self.driver_manager.paused:
+            self.driver_manager.pause()
+        elif not all_paused and self.driver_manager.paused:
+            self.driver_manager.resume()
+
+    def _placement(self, engine_id):
+        with self.lock:
+            if engine_id not in self.placements:
+                raise Exception(f"Engine {engine_id} non trovato.")
+            return self.placements[engine_id]
+
+    def _choose_worker(self):
+        load = {worker.index: 0.0 for worker in self.workers}
+        for placement in self.placements.values():
+            cycle_time = placement["args"][2]
+            load[placement["worker"]] += 1.0 / cycle_time if cycle_time else 1.0
+        return self.workers[min(load, key=lambda index: (load[index], index))]
+
+    async def _request(self, worker, command, *args):
+        if not worker.started:
+            await asyncio.to_thread(worker.ensure_started)
+        self._ensure_supervisor()
+        return await asyncio.to_thread(worker.request, command, *args)
+
+    def _ensure_supervisor(self):
+        if self._supervisor is None or self._supervisor.done():
+            self._supervisor = asyncio.get_running_loop().create_task(self._supervise())
+
+    async def _supervise(self):
+        while True:
+            await asyncio.sleep(self.supervise_interval)
+            for worker in self.workers:
+                if worker.started and not worker.is_alive():
+                    await self._restart_worker(worker)
+
+    async def _restart_worker(self, worker):
+        exitcode = worker.process.exitcode
+        logger.error("Worker engine %d terminato inaspettatamente (exit %s), riavvio.", worker.index, exitcode)
+        metrics_manager.increment_counter("engine_worker_restarts_total")
+        try:
+            await asyncio.to_thread(worker.restart)
+        except Exception as e:
+            logger.error("Riavvio del worker engine %d fallito: %s", worker.index, e)
+            return
+        with self.lock:
+            placements = [(eid, p) for eid, p in self.placements.items() if p["worker"] == worker.index]
+        for engine_id, placement in placements:
+            try:
+                await asyncio.to_thread(worker.request, "add_engine", *placement["args"])
+                if placement["paused"]:
+                    await asyncio.to_thread(worker.request, "pause_engine", engine_id)
+                logger.info("Engine %s ricreato sul worker %d.", engine_id, worker.index)
+            except Exception as e:
+                logger.error("Impossibile ricreare l'engine %s sul worker %d: %s", engine_id, worker.index, e)
 
     async def add_engine(self, engine_id, logic_filepath, cycle_time, db_path):
+        if self.multiprocess:
+            with self.lock:
+                if engine_id in self.placements:
+                    raise Exception(f"Engine {engine_id} già esistente.")
+                worker = self._choose_worker()
+                self.placements[engine_id] = {"worker": worker.index, "paused": False,
+                                              "args": (engine_id, logic_filepath, cycle_time, db_path)}
+            try:
+                await self._request(worker, "add_engine", engine_id, logic_filepath, cycle_time, db_path)
+            except Exception:
+                with self.lock:
+                    self.placements.pop(engine_id, None)
+                raise
+            logger.info("Engine %s aggiunto e avviato sul worker %d.", engine_id, worker.index)
+            return
         with self.lock:
             if engine_id in self.engines:
                 raise Exception(f"Engine {engine_id} già esistente.")
             instance = EngineInstance(engine_id, logic_filepath, cycle_time, db_path)
             self.engines[engine_id] = instance
+            pin_loop, self.pin_loop = self.pin_loop, False
+        if pin_loop:
+            spec = engine_loop_spec()
+            if spec:
+                # asyncio.to_thread and run_in_executor threads are housekeeping, not engine work
+                asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(
+                    thread_name_prefix="loop-executor",
+                    initializer=pin_housekeeping_thread,
+                    initargs=("loop-executor",),
+                ))
+            apply_placement("engine-loop", spec)
+        startup_profile.watch_engine(engine_id, instance.engine)
         await instance.start()
+        self._sync_drivers()
         logger.info("Engine %s aggiunto e avviato.", engine_id)
 
     async def remove_engine(self, engine_id):
+        if self.multiprocess:
+            placement = self._placement(engine_id)
+            await self._request(self.workers[placement["worker"]], "remove_engine", engine_id)
+            with self.lock:
+                self.placements.pop(engine_id, None)
+            logger.info("Engine %s rimosso.", engine_id)
+            return
         with self.lock:
             if engine_id not in self.engines:
                 raise Exception(f"Engine {engine_id} non trovato.")
             instance = self.engines.pop(engine_id)
         await instance.stop()
+        self._sync_drivers()
         logger.info("Engine %s rimosso.", engine_id)
 
     async def pause_engine(self, engine_id):
+        if self.multiprocess:
+            placement = self._placement(engine_id)
+            await self._request(self.workers[placement["worker"]], "pause_engine", engine_id)
+            placement["paused"] = True
+            return
         with self.lock:
             if engine_id not in self.engines:
                 raise Exception(f"Engine {engine_id} non trovato.")
             instance = self.engines[engine_id]
         await instance.pause()
+        self._sync_drivers()
         logger.info("Engine %s messo in pausa.", engine_id)
 
     async def resume_engine(self, engine_id):
+        if self.multiprocess:
+            placement = self._placement(engine_id)
+            await self._request(self.workers[placement["worker"]], "resume_engine", engine_id)
+            placement["paused"] = False
+            return
         with self.lock:
             if engine_id not in self.engines:
                 raise Exception(f"Engine {engine_id} non trovato.")
             instance = self.engines[engine_id]
+        # drivers first, so that on_resume hooks can already do I/O
+        if self.driver_manager is not None and self.driver_manager.paused:
+            self.driver_manager.resume()
         await instance.resume()
         logger.info("Engine %s ripreso.", engine_id)
 
     def list_engines(self):
+        if self.multiprocess:
+            with self.lock:
+                placements = dict(self.placements)
+            statuses = {}
+            for worker in self.workers:
+                hosted = [eid for eid, p in placements.items() if p["worker"] == worker.index]
+                if not hosted:
+                    continue
+                try:
+                    remote = worker.request("list_engines")
+                except Exception as e:
+                    remote = {eid: {"engine_id": eid, "running": False, "error": str(e)} for eid in hosted}
+                for eid in hosted:
+                    status = remote.get(eid, {"engine_id": eid, "running": False})
+                    status["worker"] = worker.index
+                    statuses[eid] = status
+            return statuses
         with self.lock:
             return {eid: inst.status() for eid, inst in self.engines.items()}
 
+    def get_trace(self, engine_id, last_n=None):
+        """Chrome trace JSON of the last cycles of an engine."""
+        if self.multiprocess:
+            placement = self._placement(engine_id)
+            return self.workers[placement["worker"]].request("get_trace", engine_id, last_n)
+        with self.lock:
+            if engine_id not in self.engines:
+                raise Exception(f"Engine {engine_id} non trovato.")
+            instance = self.engines[engine_id]
+        return instance.engine.trace.export(last_n)
+
+    async def shutdown(self):
+        """Stop every engine and, in multi-process mode, the workers."""
+        if self.multiprocess:
+            if self._supervisor is not None:
+                self._supervisor.cancel()
+                self._supervisor = None
+            await asyncio.gather(*(asyncio.to_thread(worker.stop) for worker in self.workers))
+            with self.lock:
+                self.placements.clear()
+            return
+        with self.lock:
+            instances = list(self.engines.values())
+            self.engines.clear()
+        for instance in instances:
+            await instance.stop()
+
 engine_manager = EngineManager()
 
 # Esempio di utilizzo asincrono (demo):
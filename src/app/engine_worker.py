@@ -0,0 +1,149 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from logging_config import logger
+from config_manager import config_manager
+from cpu_placement import apply_placement, worker_spec
+
+def _worker_main(index, conn):
+    """Entry point of an engine worker process: an in-process EngineManager on its own loop."""
+    asyncio.run(_serve(index, conn))
+
+async def _serve(index, conn):
+    from engine_manager import EngineManager
+    # pin the whole worker before any thread starts, so they all inherit it
+    apply_placement(f"worker-{index}", worker_spec(index))
+    manager = EngineManager(workers=0, pin_loop=False)
+    loop = asyncio.get_running_loop()
+    stopped = asyncio.Event()
+    fd = conn.fileno()
+
+    async def handle(seq, command, args):
+        try:
+            if command == "shutdown":
+                result = await manager.shutdown()
+                stopped.set()
+            else:
+                result = getattr(manager, command)(*args)
+                if asyncio.iscoroutine(result):
+                    result = await result
+            reply = (seq, True, result)
+        except Exception as e:
+            reply = (seq, False, str(e))
+        if seq is not None:
+            conn.send(reply)
+
+    def on_request():
+        try:
+            seq, command, args = conn.recv()
+        except (EOFError, OSError):
+            # the supervisor is gone: stop the engines and exit
+            loop.remove_reader(fd)
+            loop.create_task(handle(None, "shutdown", ()))
+            return
+        loop.create_task(handle(seq, command, args))
+
+    loop.add_reader(fd, on_request)
+    conn.send((0, True, os.getpid()))
+    await stopped.wait()
+    loop.remove_reader(fd)
+    logger.info("Worker engine %d terminato.", index)
+
+class EngineWorker:
+    """
+    Handle on a worker process hosting a share of the engines.
+
+    Requests are method calls on the EngineManager inside the worker, sent as
+    ``(seq, command, args)`` over a pipe; ``request`` blocks the caller (the
+    manager runs it off the loop) and is serialized by a lock.
+    """
+
+    # commands the worker accepts (EngineManager methods)
+    COMMANDS = ("add_engine", "remove_engine", "pause_engine", "resume_engine", "list_engines", "get_trace")
+
+    def __init__(self, index, start_method=None):
+        self.index = index
+        self.start_method = start_method or config_manager.get("engine_worker_start_method", "spawn")
+        self.timeout = config_manager.get_float("engine_worker_timeout", 30.0)
+        self.process = None
+        self.restarts = 0
+        self._conn = None
+        self._seq = 0
+        self._lock = threading.Lock()
+        # serializes start/restart so concurrent first requests spawn a single process
+        self._start_lock = threading.Lock()
+
+    @property
+    def started(self):
+        return self.process is not None
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def start(self):
+        # requests wait until the ready message has been read, they must not consume it
+        with self._lock:
+            ctx = multiprocessing.get_context(self.start_method)
+            self._conn, child_conn = ctx.Pipe()
+            # not a daemon: engines inside may start their own block worker processes
+            self.process = ctx.Process(target=_worker_main, args=(self.index, child_conn), name=f"engine-worker-{self.index}")
+            self.process.start()
+            child_conn.close()
+            if not self._conn.poll(self.timeout):
+                self.kill()
+                raise RuntimeError(f"Worker engine {self.index} non pronto entro {self.timeout}s")
+            self._conn.recv()
+        logger.info("Worker engine %d avviato (pid %s).", self.index, self.process.pid)
+
+    def ensure_started(self):
+        """Start the worker unless another caller already did."""
+        with self._start_lock:
+            if not self.started:
+                self.start()
+
+    def restart(self):
+        with self._start_lock:
+            self.kill()
+            self.restarts += 1
+            self.start()
+
+    def request(self, command, *args):
+        if command not in self.COMMANDS and command != "shutdown":
+            raise ValueError(f"Comando non supportato: {command}")
+        with self._lock:
+            if not self.is_alive():
+                raise RuntimeError(f"Worker engine {self.index} non attivo")
+            self._seq += 1
+            seq = self._seq
+            self._conn.send((seq, command, args))
+            while True:
+                if not self._conn.poll(self.timeout):
+                    raise TimeoutError(f"Nessuna risposta dal worker engine {self.index} a {command}")
+                reply_seq, ok, result = self._conn.recv()
+                # replies to requests abandoned by a timeout are dropped
+                if reply_seq == seq:
+                    break
+        if not ok:
+            raise Exception(result)
+        return result
+
+    def stop(self):
+        if not self.started:
+            return
+        try:
+            if self.is_alive():
+                self.request("shutdown")
+        except Exception as e:
+            logger.error("Errore nello stop del worker engine %d: %s", self.index, e)
+        self.process.join(timeout=self.timeout)
+        self.kill()
+
+    def kill(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=1.0)
+        if self._conn is not None:
+            self._conn.close()
+        self.process = None
+        self._conn = None
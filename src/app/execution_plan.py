@@ -0,0 +1,89 @@
+from logging_config import logger
+
+def block_io(block):
+    """Return the DataPool variables a block declares to read and write (``reads``/``writes`` attributes)."""
+    reads = frozenset(getattr(block, "reads", None) or ())
+    writes = frozenset(getattr(block, "writes", None) or ())
+    return reads, writes
+
+class ExecutionPlan:
+    """
+    Topologically ordered stages of logic blocks.
+
+    Stages run one after the other; the blocks of a stage do not depend on
+    each other and can run concurrently. Blocks without declarations have no
+    dependencies and land in the first stage.
+    """
+
+    def __init__(self, stages=None):
+        self.stages = stages or []
+
+    def __len__(self):
+        return sum(len(stage) for stage in self.stages)
+
+    def names(self):
+        return [name for stage in self.stages for name, _ in stage]
+
+def build_execution_plan(blocks):
+    """
+    Build the execution plan of a ``{name: block}`` dict.
+
+    A block depends on every block writing a variable it reads; blocks writing
+    the same variable keep their declaration order. Circular dependencies are
+    logged and the blocks of the cycle share a single stage; the blocks
+    depending on the cycle keep their topological order after it.
+    """
+    names = list(blocks)
+    io = {name: block_io(block) for name, block in blocks.items()}
+    writers = {}
+    for name in names:
+        for var in io[name][1]:
+            writers.setdefault(var, []).append(name)
+    deps = {name: set() for name in names}
+    for name in names:
+        for var in io[name][0]:
+            deps[name].update(writer for writer in writers.get(var, ()) if writer != name)
+    for same_var_writers in writers.values():
+        for earlier, later in zip(same_var_writers, same_var_writers[1:]):
+            deps[later].add(earlier)
+
+    stages = []
+    done = set()
+    while deps:
+        ready = [name for name in names if name in deps and deps[name] <= done]
+        if not ready:
+            ready = _first_ready_cycle(names, deps, done)
+            logger.warning("Dipendenza circolare tra i blocchi %s: eseguiti nello stesso stage.", ready)
+        stages.append([(name, blocks[name]) for name in ready])
+        done.update(ready)
+        for name in ready:
+            del deps[name]
+    return ExecutionPlan(stages)
+
+def _reachable(start, edges):
+    seen = {start}
+    stack = [start]
+    while stack:
+        for nxt in edges[stack.pop()]:
+            if nxt not in seen:
+                seen.add(nxt)
+                stack.append(nxt)
+    return seen
+
+def _first_ready_cycle(names, deps, done):
+    """
+    Blocks of the first circular dependency (in declaration order) whose
+    dependencies outside the cycle have all run: the strongly connected
+    component of the remaining dependency graph containing that block.
+    """
+    remaining = [name for name in names if name in deps]
+    upstream = {name: deps[name] - done for name in remaining}
+    downstream = {name: set() for name in remaining}
+    for name in remaining:
+        for dep in upstream[name]:
+            downstream[dep].add(name)
+    for name in remaining:
+        cycle = _reachable(name, upstream) & _reachable(name, downstream)
+        if all(upstream[member] <= cycle for member in cycle):
+            return [member for member in remaining if member in cycle]
+    return remaining
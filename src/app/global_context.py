@@ -1,5 +1,5 @@
 from data_pool import data_pool
-from VPLC.io_manager import DriverManager
+from io_manager import DriverManager
 
 global_data_pool = data_pool
 global_driver_manager = DriverManager()
\ No newline at end of file
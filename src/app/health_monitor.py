@@ -26,6 +26,8 @@ class HealthMonitor:
         self.thread = None
 
     def monitor(self):
+        from cpu_placement import pin_housekeeping_thread
+        pin_housekeeping_thread("health-monitor")
         while self.running:
             now = time.time()
             if self.engine:
@@ -16,9 +16,11 @@ class BaseIODriver(ABC):
         pass
 
 import time
+import random
 import threading
 import asyncio
 from logging_config import logger
+from engine_clock import default_clock
 from event_bus import event_bus
 
 class BaseIODriver:
@@ -50,6 +52,8 @@ class DriverManager:
         self.drivers = {}
         self.health_check_interval = health_check_interval
         self.running = False
+        # a paused manager keeps its thread but skips the health checks and refuses driver reads/writes
+        self.paused = False
         self.thread = None
         self.lock = threading.Lock()
 
@@ -76,7 +80,12 @@ class DriverManager:
                     driver.active = False
 
     def poll_drivers(self):
+        from cpu_placement import pin_housekeeping_thread
+        pin_housekeeping_thread("driver-poll")
         while self.running:
+            if self.paused:
+                time.sleep(self.health_check_interval)
+                continue
             with self.lock:
                 for driver in self.drivers.values():
                     if not driver.health_check():
@@ -95,11 +104,26 @@ class DriverManager:
         if self.thread:
             self.thread.join()
 
+    def pause(self):
+        self.paused = True
+        logger.info("Polling dei driver sospeso.")
+
+    def resume(self):
+        with self.lock:
+            # the drivers were idle on purpose: do not report them unhealthy on the first check
+            for driver in self.drivers.values():
+                driver.update_heartbeat()
+        self.paused = False
+        logger.info("Polling dei driver ripreso.")
+
     async def read_driver(self, driver_name):
         with self.lock:
             driver = self.drivers.get(driver_name)
         if not driver:
             raise Exception(f"Driver {driver_name} non trovato")
+        if self.paused:
+            # every engine using the drivers is paused: no field I/O
+            raise Exception(f"Driver {driver_name} in pausa")
         if asyncio.iscoroutinefunction(driver.read):
             return await driver.read()
         else:
@@ -110,6 +134,8 @@ class DriverManager:
             driver = self.drivers.get(driver_name)
         if not driver:
             raise Exception(f"Driver {driver_name} non trovato")
+        if self.paused:
+            raise Exception(f"Driver {driver_name} in pausa")
         if asyncio.iscoroutinefunction(driver.write):
             return await driver.write(data)
         else:
@@ -179,20 +205,28 @@ class MockDriver(BaseIODriver):
 
 
 class ConfigurableMockDriver(MockDriver):
-    import random
-    from asyncio import sleep
-    async def read(self):
-        await sleep(self.latency + random.uniform(0, self.latency))
-        if random.random() < self.error_rate:
-            raise Exception('Simulated error')
-        return 'data'
-    def __init__(self, latency=0, error_rate=0):
+    """
+    Mock driver with simulated latency and error rate.
+
+    Latency is spent on the injected clock, so against a VirtualClock reads
+    cost simulated time only; ``seed`` makes the error sequence reproducible.
+    """
+    def __init__(self, latency=0, error_rate=0, seed=None, clock=None, value='data'):
         self.latency = latency
         self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.clock = clock or default_clock
+        self.value = value
+        self.reads = 0
+        self.errors = 0
+
     async def read(self):
-        time.sleep(self.latency)
-        if random.random() < self.error_rate:
+        if self.latency:
+            await self.clock.sleep(self.latency + self.rng.uniform(0, self.latency))
+        self.reads += 1
+        if self.rng.random() < self.error_rate:
+            self.errors += 1
             raise Exception('Simulated error')
-        return 'data'
+        return self.value
 
 # End of IO enhancements
@@ -7,12 +7,14 @@ from opentelemetry import trace
 
 import queue
 
+# QueueListener of the last logger set up (its thread is pinned by startup.bootstrap)
+log_listener = None
+
 class JsonFormatter(logging.Formatter):
     tracer = trace.get_tracer(__name__)
 
     def format(self, record):
         log_record = {
-            log_record['correlation_id'] = getattr(record, 'correlation_id', None)
             'time': self.formatTime(record, self.datefmt),
             'level': record.levelname,
             'message': record.getMessage(),
@@ -21,6 +23,7 @@ class JsonFormatter(logging.Formatter):
             'lineno': record.lineno,
             'funcName': record.funcName
         }
+        log_record['correlation_id'] = getattr(record, 'correlation_id', None)
         return json.dumps(log_record)
 
 def setup_logger(name='engine_logger', log_file='engine.log', level=logging.DEBUG,
@@ -93,8 +96,10 @@ def setup_logger(name='engine_logger', log_file='engine.log', level=logging.DEBU
     else:
         logger.warning("DATADOG_API_KEY non impostata, salto HTTPHandler per Datadog")
 
+    global log_listener
     listener = logging.handlers.QueueListener(log_queue, *real_handlers, respect_handler_level=True)
     listener.start()
+    log_listener = listener
 
     return logger
 
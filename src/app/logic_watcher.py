@@ -0,0 +1,146 @@
+import os
+import threading
+from logging_config import logger
+from config_manager import config_manager
+from metrics_manager import metrics_manager
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    FileSystemEventHandler = object
+    WATCHDOG_AVAILABLE = False
+    logger.warning("Modulo watchdog non installato; reload della logica tramite polling.")
+
+class _PollingFlag:
+    """Stand-in reload flag used without watchdog: always set, so reload_logic falls back to mtime checks."""
+
+    def is_set(self):
+        return True
+
+    def set(self):
+        pass
+
+    def clear(self):
+        pass
+
+class _LogicDirectoryHandler(FileSystemEventHandler):
+    def __init__(self, service):
+        self.service = service
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        self.service.notify(event.src_path)
+        # editors often save through a temp file renamed over the original
+        dest_path = getattr(event, "dest_path", None)
+        if dest_path:
+            self.service.notify(dest_path)
+
+class LogicWatcherService:
+    """
+    Shared file watcher for logic modules.
+
+    A single watchdog observer serves every engine of the process. Engines
+    watching the same file share one debounce timer, and each receives a
+    threading.Event that the cycle checks in O(1) instead of stat-ing the file.
+    """
+
+    def __init__(self, debounce=None):
+        self.debounce = debounce if debounce is not None else config_manager.get_float("logic_reload_debounce_seconds", 0.2)
+        self._lock = threading.Lock()
+        self._flags = {}
+        self._timers = {}
+        self._watches = {}
+        self._observer = None
+
+    def watch(self, filepath):
+        """Register interest in a logic file and return its reload flag (initially set)."""
+        if not WATCHDOG_AVAILABLE:
+            return _PollingFlag()
+        path = os.path.abspath(filepath)
+        flag = threading.Event()
+        flag.set()
+        observer = None
+        with self._lock:
+            directory = os.path.dirname(path)
+            if directory in self._watches:
+                watch, refs = self._watches[directory]
+                self._watches[directory] = (watch, refs + 1)
+            else:
+                if self._observer is None:
+                    self._observer = Observer()
+                    self._observer.daemon = True
+                    self._observer.start()
+                try:
+                    watch = self._observer.schedule(_LogicDirectoryHandler(self), directory, recursive=False)
+                except Exception as e:
+                    # e.g. a missing directory: the engine still starts, reloading by mtime
+                    logger.error("Watch sul file di logica %s non disponibile, uso il polling: %s", path, e)
+                    if not self._watches:
+                        observer, self._observer = self._observer, None
+                    watch = None
+                else:
+                    self._watches[directory] = (watch, 1)
+            # the flag is registered only once the directory is actually watched
+            if watch is not None:
+                self._flags.setdefault(path, set()).add(flag)
+        if observer:
+            observer.stop()
+        if watch is None:
+            return _PollingFlag()
+        logger.info("Watch attivo sul file di logica %s", path)
+        return flag
+
+    def unwatch(self, filepath, flag):
+        if not WATCHDOG_AVAILABLE:
+            return
+        path = os.path.abspath(filepath)
+        observer = None
+        with self._lock:
+            flags = self._flags.get(path)
+            if not flags or flag not in flags:
+                return
+            flags.discard(flag)
+            if not flags:
+                del self._flags[path]
+                timer = self._timers.pop(path, None)
+                if timer:
+                    timer.cancel()
+            directory = os.path.dirname(path)
+            watch, refs = self._watches[directory]
+            if refs > 1:
+                self._watches[directory] = (watch, refs - 1)
+                return
+            del self._watches[directory]
+            self._observer.unschedule(watch)
+            if not self._watches:
+                observer, self._observer = self._observer, None
+        if observer:
+            observer.stop()
+
+    def notify(self, filepath):
+        """(Re)start the debounce timer of a watched file; bursts of writes produce one reload."""
+        path = os.path.abspath(filepath)
+        with self._lock:
+            if path not in self._flags:
+                return
+            timer = self._timers.get(path)
+            if timer:
+                timer.cancel()
+            timer = threading.Timer(self.debounce, self._fire, args=(path,))
+            timer.daemon = True
+            self._timers[path] = timer
+            timer.start()
+
+    def _fire(self, path):
+        with self._lock:
+            self._timers.pop(path, None)
+            flags = list(self._flags.get(path, ()))
+        for flag in flags:
+            flag.set()
+        metrics_manager.increment_counter("logic_reload_events_total")
+        logger.info("Modifica rilevata su %s, reload richiesto per %d engine.", path, len(flags))
+
+logic_watcher = LogicWatcherService()
@@ -3,13 +3,15 @@ io_latency = Histogram('io_latency_seconds','I/O operation latency')
 db_write_duration = Histogram('db_write_duration_seconds','DB write duration')
 from prometheus_client import Histogram
 engine_cycle_duration = Histogram('engine_cycle_duration_seconds', 'Duration of engine cycle in seconds')
+import bisect
+import os
 import threading
 import time
 import inspect
 from prometheus_client import Gauge, Counter, Histogram, start_http_server
-port = int(os.getenv('METRICS_PORT', '8000'))  # configurable via env
-start_http_server(port)
+from prometheus_client.core import CounterMetricFamily, HistogramMetricFamily, REGISTRY
 from config_manager import config_manager
+from logging_config import logger
 
 app_latency_histogram = Histogram('app_request_latency_seconds', 'Latenza delle richieste dell\'app')
 app_error_counter = Counter('app_error_rate_total', 'Numero totale di errori nell\'app')
@@ -43,6 +45,149 @@ def track_global_metrics(func):
                 app_latency_histogram.observe(time.time() - start)
         return wrapper
 
+HOT_PATH_BUCKETS = (1e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3, 1e-2, 2.5e-2, 0.1, 1.0)
+
+class HistogramHandle:
+    """
+    Histogram child bound to fixed label values.
+
+    Each thread records into its own shard (bucket counts plus sum), so
+    observe() takes no lock and formats no strings; shards are summed when
+    Prometheus scrapes.
+    """
+    __slots__ = ("_bounds", "_local", "_shards", "_lock")
+
+    def __init__(self, bounds):
+        self._bounds = bounds
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._new_shard()
+        shard[bisect.bisect_left(self._bounds, value)] += 1
+        shard[-1] += value
+
+    def _new_shard(self):
+        # one count per bucket, one for +Inf, then the sum
+        shard = [0] * (len(self._bounds) + 1) + [0.0]
+        with self._lock:
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+    def snapshot(self):
+        with self._lock:
+            shards = list(self._shards)
+        counts = [0] * (len(self._bounds) + 1)
+        total = 0.0
+        for shard in shards:
+            for i in range(len(counts)):
+                counts[i] += shard[i]
+            total += shard[-1]
+        return counts, total
+
+class CounterHandle:
+    """Counter child bound to fixed label values, sharded per thread like HistogramHandle."""
+    __slots__ = ("_local", "_shards", "_lock")
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = [0]
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        shard[0] += amount
+
+    def value(self):
+        with self._lock:
+            return sum(shard[0] for shard in self._shards)
+
+class ShardedHistogram:
+    """Labeled histogram for hot paths: resolve a handle once with labels(), then observe lock-free."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=HOT_PATH_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.bounds = tuple(sorted(buckets))
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *label_values):
+        with self._lock:
+            handle = self._children.get(label_values)
+            if handle is None:
+                handle = self._children[label_values] = HistogramHandle(self.bounds)
+            return handle
+
+    def remove(self, *label_values):
+        with self._lock:
+            self._children.pop(label_values, None)
+
+    def collect(self):
+        family = HistogramMetricFamily(self.name, self.documentation, labels=self.labelnames)
+        with self._lock:
+            children = list(self._children.items())
+        for label_values, handle in children:
+            counts, total = handle.snapshot()
+            buckets = []
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float("inf"),), counts):
+                cumulative += count
+                buckets.append(("+Inf" if bound == float("inf") else str(bound), cumulative))
+            family.add_metric(list(label_values), buckets, total)
+        return family
+
+class ShardedCounter:
+    """Labeled counter for hot paths, see ShardedHistogram."""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *label_values):
+        with self._lock:
+            handle = self._children.get(label_values)
+            if handle is None:
+                handle = self._children[label_values] = CounterHandle()
+            return handle
+
+    def remove(self, *label_values):
+        with self._lock:
+            self._children.pop(label_values, None)
+
+    def collect(self):
+        family = CounterMetricFamily(self.name, self.documentation, labels=self.labelnames)
+        with self._lock:
+            children = list(self._children.items())
+        for label_values, handle in children:
+            family.add_metric(list(label_values), handle.value())
+        return family
+
+class _ShardedCollector:
+    """Aggregates the sharded hot-path metrics into the Prometheus registry on scrape."""
+
+    def __init__(self, manager):
+        self.manager = manager
+
+    def collect(self):
+        with self.manager.lock:
+            metrics = list(self.manager.hot_metrics.values())
+        for metric in metrics:
+            yield metric.collect()
+
 class MetricsManager:
     def __init__(self):
         self.metrics = {}
@@ -50,6 +195,24 @@ class MetricsManager:
         self.prometheus_metrics = {}
         self.prometheus_counters = {}
         self.prometheus_histograms = {}
+        self.hot_metrics = {}
+        self.http_port = None
+        REGISTRY.register(_ShardedCollector(self))
+
+    def start_http_server(self, port=None):
+        """
+        Espone l'endpoint /metrics. Chiamato esplicitamente dal bootstrap e non
+        all'import; le chiamate successive non avviano altri server.
+        """
+        with self.lock:
+            if self.http_port is not None:
+                return self.http_port
+            if port is None:
+                port = int(os.getenv('METRICS_PORT') or config_manager.get_int("metrics_port", 8000))
+            start_http_server(port)
+            self.http_port = port
+        logger.info("Endpoint metriche esposto sulla porta %d", port)
+        return port
 
     def record_metric(self, name, value):
         """Registra o aggiorna la metrica di tipo Gauge con il valore specificato."""
@@ -73,6 +236,20 @@ class MetricsManager:
                 self.prometheus_histograms[name] = Histogram(name, f'Istopogramma per {name}')
             self.prometheus_histograms[name].observe(value)
 
+    def hot_histogram(self, name, documentation, labelnames=(), buckets=HOT_PATH_BUCKETS):
+        """Restituisce (creandolo una sola volta) un istogramma con label per l'hot path."""
+        with self.lock:
+            if name not in self.hot_metrics:
+                self.hot_metrics[name] = ShardedHistogram(name, documentation, labelnames, buckets)
+            return self.hot_metrics[name]
+
+    def hot_counter(self, name, documentation, labelnames=()):
+        """Restituisce (creandolo una sola volta) un contatore con label per l'hot path."""
+        with self.lock:
+            if name not in self.hot_metrics:
+                self.hot_metrics[name] = ShardedCounter(name, documentation, labelnames)
+            return self.hot_metrics[name]
+
     def get_metric(self, name):
         """Recupera il valore della metrica specificata."""
         with self.lock:
@@ -128,8 +305,5 @@ class MetricsManager:
         return decorator
 
 metrics_manager = MetricsManager()
-metrics_port = config_manager.get_int("metrics_port", 8000)
-start_http_server(metrics_port)  # Espone l'endpoint /metrics sulla porta configurata
-port = int(os.getenv('METRICS_PORT', '8000'))  # configurable via env
-start_http_server(port)
-# Visita http://localhost:8000/metrics per visualizzare le metriche esposte.
\ No newline at end of file
+# L'endpoint /metrics si avvia con metrics_manager.start_http_server() (vedi startup.bootstrap),
+# poi visita http://localhost:8000/metrics per visualizzare le metriche esposte.
\ No newline at end of file
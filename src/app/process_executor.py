@@ -0,0 +1,203 @@
+import asyncio
+import math
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+from logging_config import logger
+from config_manager import config_manager
+from data_pool import data_pool, TYPE_CODES
+from execution_plan import block_io
+from process_image import ProcessImage, takes_context
+from state_persistence import StateChangeTracker
+
+_SLOT_SIZE = 8
+# types that survive a round trip through a float64 slot (integers up to 2**53)
+FLOAT_TYPES = frozenset(t for t, code in TYPE_CODES.items() if code == "d")
+SLOT_TYPES = frozenset(TYPE_CODES) | {"bool"}
+
+def _to_slot(value):
+    return math.nan if value is None else float(value)
+
+def _from_slot(value, data_type):
+    if math.isnan(value):
+        return None
+    if data_type in FLOAT_TYPES:
+        return value
+    if data_type == "bool":
+        return bool(value)
+    return int(value)
+
+def slot_types(name, variables, pool=None):
+    """
+    Data type of each variable exchanged with a block worker. Unregistered
+    variables travel as floats; variables of non-scalar types cannot go
+    through the float64 slots and are rejected.
+    """
+    pool = pool or data_pool
+    types = []
+    for var in variables:
+        data_type = pool.type_of(var) or "float"
+        if data_type not in SLOT_TYPES:
+            raise ValueError(f"Variabile {var} di tipo {data_type} non supportata dal blocco {name} "
+                             f"in un processo separato: servono tipi scalari numerici")
+        types.append(data_type)
+    return tuple(types)
+
+def _worker_main(logic_filepath, block_name, shm_name, reads, writes, types, conn):
+    """Entry point of a block worker process: hosts the block and runs it on request."""
+    from dynamic_loader import load_logic_module
+    shm = shared_memory.SharedMemory(name=shm_name)
+    values = shm.buf.cast('d')
+    block = load_logic_module(logic_filepath)[block_name]
+    # values are converted back to their declared type; None (a NaN slot) has to fit, hence object storage
+    handles = [data_pool.register_variable(var, address) for address, var in enumerate(reads + writes)]
+    read_handles, write_handles = handles[:len(reads)], handles[len(reads):]
+    read_types = types[:len(reads)]
+    image = None
+    if takes_context(block):
+        image = ProcessImage(data_pool)
+        image.set_inputs(reads)
+    args = (image,) if image is not None else ()
+    tracker = StateChangeTracker()
+    loop = asyncio.new_event_loop() if asyncio.iscoroutinefunction(block.execute) else None
+    conn.send(("ready", None, None))
+    try:
+        while True:
+            msg, seq, payload = conn.recv()
+            if msg == "stop":
+                break
+            if msg == "set_state":
+                block.set_state(payload)
+                tracker.remember(block_name, payload)
+                continue
+            data_pool.set_many(read_handles, [_from_slot(v, t) for v, t in zip(values[:len(reads)], read_types)])
+            if image is not None:
+                image.refresh()
+            start = time.perf_counter()
+            try:
+                if loop:
+                    loop.run_until_complete(block.execute(*args))
+                else:
+                    block.execute(*args)
+                if image is not None:
+                    image.commit()
+            except Exception as e:
+                conn.send(("error", seq, repr(e)))
+                continue
+            exec_time = time.perf_counter() - start
+            offset = len(reads)
+            for j, value in enumerate(data_pool.get_many(write_handles)):
+                values[offset + j] = _to_slot(value)
+            state = None
+            if hasattr(block, "get_state"):
+                current = block.get_state()
+                if tracker.has_changed(block_name, current):
+                    state = current
+            conn.send(("done", seq, (exec_time, state)))
+    finally:
+        values.release()
+        shm.close()
+        if loop:
+            loop.close()
+
+class ProcessBlock:
+    """
+    Proxy for a logic block hosted in a persistent worker process.
+
+    The declared ``reads`` are copied into a shared-memory array of float64
+    slots before each run and the ``writes`` copied back afterwards, converted
+    to each variable's declared scalar type (other types are rejected when the
+    block is built, so it runs in-process); only a
+    tiny run request and, when it changed, the block state cross the pipe.
+    ``execute`` is a coroutine, so the engine awaits it like an async block
+    without blocking the loop or the GIL. Like any block taking a context,
+    it reads its inputs from the engine's ProcessImage snapshot and stages
+    its outputs there, to be committed at cycle end.
+    """
+
+    def __init__(self, name, block, logic_filepath, start_method=None, pool=None):
+        reads, writes = block_io(block)
+        self.name = name
+        self.pool = pool or data_pool
+        self.reads = tuple(sorted(reads))
+        self.writes = tuple(sorted(writes))
+        self.types = slot_types(name, self.reads + self.writes, self.pool)
+        self.last_exec_time = None
+        self._seq = 0
+        self._state = block.get_state() if hasattr(block, "get_state") else None
+        self._shm = shared_memory.SharedMemory(create=True, size=_SLOT_SIZE * max(len(self.reads) + len(self.writes), 1))
+        self._values = self._shm.buf.cast('d')
+        ctx = multiprocessing.get_context(start_method or config_manager.get("process_block_start_method", "spawn"))
+        self._conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main,
+            args=(logic_filepath, name, self._shm.name, self.reads, self.writes, self.types, child_conn),
+            name=f"block-{name}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        timeout = config_manager.get_float("process_block_start_timeout", 30.0)
+        if not self._conn.poll(timeout):
+            self.close()
+            raise RuntimeError(f"Worker del blocco {name} non pronto entro {timeout}s")
+        self._conn.recv()
+        if self._state is not None:
+            self.set_state(self._state)
+        logger.info("Blocco %s avviato nel processo %s.", name, self.process.pid)
+
+    async def execute(self, context=None):
+        read = context.read if context is not None else self.pool.get_variable
+        for i, var in enumerate(self.reads):
+            self._values[i] = _to_slot(read(var))
+        self._seq += 1
+        seq = self._seq
+        loop = asyncio.get_running_loop()
+        reply = loop.create_future()
+        fd = self._conn.fileno()
+        loop.add_reader(fd, self._on_reply, seq, reply)
+        try:
+            self._conn.send(("run", seq, None))
+            msg, payload = await reply
+        finally:
+            loop.remove_reader(fd)
+        if msg == "error":
+            raise RuntimeError(payload)
+        exec_time, state = payload
+        if state is not None:
+            self._state = state
+        write = context.write if context is not None else self.pool.update_variable
+        offset = len(self.reads)
+        for j, var in enumerate(self.writes):
+            value = _from_slot(self._values[offset + j], self.types[offset + j])
+            # outputs the block never set stay untouched
+            if value is not None:
+                write(var, value)
+        self.last_exec_time = exec_time
+
+    def _on_reply(self, seq, reply):
+        msg, reply_seq, payload = self._conn.recv()
+        # replies of runs abandoned by a timeout are drained and dropped
+        if reply_seq == seq and not reply.done():
+            reply.set_result((msg, payload))
+
+    def get_state(self):
+        return self._state
+
+    def set_state(self, state):
+        self._state = state
+        self._conn.send(("set_state", None, state))
+
+    def close(self):
+        try:
+            self._conn.send(("stop", None, None))
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.terminate()
+        self._conn.close()
+        self._values.release()
+        self._shm.close()
+        self._shm.unlink()
+        logger.info("Worker del blocco %s terminato.", self.name)
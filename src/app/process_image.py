@@ -0,0 +1,110 @@
+import inspect
+from logging_config import logger
+from data_pool import data_pool as default_data_pool
+
+def takes_context(block):
+    """True if ``block.execute`` accepts the process image as its context argument."""
+    try:
+        parameters = inspect.signature(block.execute).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD, p.VAR_POSITIONAL) for p in parameters)
+
+class ProcessImage:
+    """
+    PLC-style process image of the DataPool for one engine.
+
+    ``refresh`` takes a snapshot of the input variables at cycle start with a
+    single bulk read; blocks read it through ``image[name]``, so a driver
+    updating the pool halfway through the cycle is only seen next cycle.
+    Writes (``image[name] = value``) are staged: later blocks of the same
+    cycle read them back, and ``commit`` writes them to the pool in one bulk
+    operation at cycle end and passes them to the sinks registered with
+    ``add_sink``. No driver is registered as a sink: drivers are written
+    through the DriverManager.
+    """
+
+    def __init__(self, pool=None):
+        self.pool = pool or default_data_pool
+        self.inputs = {}
+        self.outputs = {}
+        self.sinks = []
+        self._input_names = []
+        self._input_handles = []
+        self._handles = {}
+        self._unknown = set()
+
+    def set_inputs(self, names):
+        """Variables snapshotted by ``refresh``; names not registered in the pool are read on demand."""
+        self._input_names = []
+        self._input_handles = []
+        for name in sorted(names):
+            handle = self._handle(name)
+            if handle is not None:
+                self._input_names.append(name)
+                self._input_handles.append(handle)
+        self.inputs = {}
+
+    def add_sink(self, callback):
+        """Call ``callback(outputs)`` with the ``{name: value}`` committed at the end of each cycle."""
+        self.sinks.append(callback)
+
+    def _handle(self, name):
+        handle = self._handles.get(name)
+        if handle is None:
+            try:
+                handle = self._handles[name] = self.pool.handle_of(name)
+            except KeyError:
+                return None
+        return handle
+
+    def refresh(self):
+        self.inputs = dict(zip(self._input_names, self.pool.get_many(self._input_handles)))
+
+    def __getitem__(self, name):
+        try:
+            return self.outputs[name]
+        except KeyError:
+            pass
+        try:
+            return self.inputs[name]
+        except KeyError:
+            # undeclared read: take it from the pool once and keep it for the rest of the cycle
+            value = self.inputs[name] = self.pool.get_variable(name)
+            return value
+
+    def __setitem__(self, name, value):
+        self.outputs[name] = value
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    read = __getitem__
+    write = __setitem__
+
+    def commit(self):
+        """Write the staged outputs to the pool and the sinks; returns them."""
+        if not self.outputs:
+            return {}
+        outputs, self.outputs = self.outputs, {}
+        handles = []
+        values = []
+        for name, value in outputs.items():
+            handle = self._handle(name)
+            if handle is None:
+                if name not in self._unknown:
+                    self._unknown.add(name)
+                    logger.error("Variabile %s non registrata nel DataPool: scrittura scartata.", name)
+                continue
+            handles.append(handle)
+            values.append(value)
+        self.pool.set_many(handles, values)
+        for sink in self.sinks:
+            try:
+                sink(outputs)
+            except Exception as e:
+                logger.error("Errore nell'invio delle uscite del ciclo: %s", e)
+        return outputs
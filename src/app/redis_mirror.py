@@ -0,0 +1,141 @@
+import atexit
+import json
+import threading
+import time
+from logging_config import logger
+from metrics_manager import metrics_manager
+
+REDIS_KEY = "datapool"
+
+def encode_tag(value, timestamp, quality):
+    """Compact JSON encoding of a mirrored tag: ``[value, timestamp, quality]``."""
+    return json.dumps([value, timestamp, quality], separators=(",", ":"), default=str)
+
+def decode_tag(raw):
+    value, timestamp, quality = json.loads(raw)
+    return {"value": value, "timestamp": timestamp, "quality": quality}
+
+class RedisMirror:
+    """
+    Write-behind mirror of a DataPool into a Redis hash.
+
+    Writes only mark the tag dirty (a set add, no I/O); a background thread
+    sends the latest value of every dirty tag every ``interval`` seconds as
+    pipelined ``HSET`` batches of at most ``batch_size`` fields. The pending
+    set holds one entry per tag however fast it is written, so a slow or
+    unreachable Redis costs staleness, not memory: failed batches are
+    re-queued and the flusher backs off up to ``max_backoff`` seconds.
+    ``lag`` is the age of the oldest change not yet in Redis at the last
+    flush attempt, so it keeps growing while Redis is down. A started
+    mirror is stopped, and its pending tags flushed, at interpreter exit.
+    """
+
+    def __init__(self, pool, client, interval=0.1, batch_size=500, max_backoff=5.0, key=REDIS_KEY):
+        self.pool = pool
+        self.client = client
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_backoff = max_backoff
+        self.key = key
+        self._dirty = set()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._backoff = 0.0
+        # time of the first mark not yet flushed, None when nothing is pending
+        self._pending_since = None
+        self.running = False
+        self.thread = None
+        self.written = 0
+        self.failures = 0
+        self.lag = 0.0
+
+    @property
+    def backlog(self):
+        return len(self._dirty)
+
+    def mark(self, handle):
+        if self._pending_since is None:
+            self._pending_since = time.time()
+        self._dirty.add(handle)
+
+    def mark_many(self, handles):
+        if self._pending_since is None:
+            self._pending_since = time.time()
+        self._dirty.update(handles)
+
+    def flush(self):
+        """Send the dirty tags to Redis. Returns the number of tags written."""
+        with self._flush_lock:
+            since, self._pending_since = self._pending_since, None
+            handles = list(self._dirty)
+            # writes landing after this point mark the tag again; the values read below are at least as new
+            self._dirty.difference_update(handles)
+            metrics_manager.record_metric("datapool_redis_mirror_backlog", len(handles))
+            if not handles:
+                self.lag = 0.0
+                metrics_manager.record_metric("datapool_redis_mirror_lag_seconds", 0.0)
+                return 0
+            start = time.time()
+            if since is None:
+                since = start
+            names = self.pool._names
+            pipe = self.client.pipeline(transaction=False)
+            for first in range(0, len(handles), self.batch_size):
+                batch = {}
+                for h in handles[first:first + self.batch_size]:
+                    value, timestamp, quality = self.pool.read(h)
+                    batch[names[h]] = encode_tag(value, timestamp, quality)
+                pipe.hset(self.key, mapping=batch)
+            try:
+                pipe.execute()
+            except Exception as e:
+                self._dirty.update(handles)
+                # the re-queued changes are still as old as the first of them
+                pending_since = self._pending_since
+                self._pending_since = since if pending_since is None else min(since, pending_since)
+                self.lag = time.time() - since
+                metrics_manager.record_metric("datapool_redis_mirror_lag_seconds", self.lag)
+                self.failures += 1
+                self._backoff = min(max(self._backoff * 2, self.interval), self.max_backoff)
+                metrics_manager.increment_counter("datapool_redis_mirror_failures_total")
+                logger.error("Mirror Redis del DataPool fallito (%d variabili in attesa): %s", len(handles), e)
+                return 0
+            self._backoff = 0.0
+            # age of the oldest change just written
+            self.lag = time.time() - since
+            self.written += len(handles)
+            metrics_manager.record_metric("datapool_redis_mirror_lag_seconds", self.lag)
+            metrics_manager.observe_histogram("datapool_redis_mirror_flush_latency_seconds", time.time() - start)
+            metrics_manager.increment_counter("datapool_redis_mirror_written_total", len(handles))
+            return len(handles)
+
+    def _run(self):
+        from cpu_placement import pin_housekeeping_thread
+        pin_housekeeping_thread("datapool-redis-mirror")
+        while self.running:
+            self._wakeup.wait(self.interval + self._backoff)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Errore nel mirror Redis del DataPool: %s", e)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="datapool-redis-mirror", daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+        logger.info("Mirror Redis del DataPool avviato (intervallo %.3fs).", self.interval)
+
+    def stop(self):
+        """Stop the flusher thread and send whatever is still pending."""
+        atexit.unregister(self.stop)
+        self.running = False
+        self._wakeup.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        self.flush()
+        logger.info("Mirror Redis del DataPool fermato.")
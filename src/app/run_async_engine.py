@@ -1,12 +1,15 @@
+from startup import bootstrap
 import argparse
 import asyncio
-from engine_manager import EngineManager
 
 def main():
     parser = argparse.ArgumentParser(description="Run Async Engine")
     parser.add_argument('--config', default='config/config_prod.json', help='Path to config file')
     parser.add_argument('--env', default='prod', choices=['prod','test'], help='Environment')
     args = parser.parse_args()
+    profile = bootstrap()
+    profile.log_report()
+    from engine_manager import EngineManager
     manager = EngineManager(env=args.env, config_file=args.config)
 
 import signal
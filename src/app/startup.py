@@ -0,0 +1,128 @@
+import importlib
+import sys
+import time
+from contextlib import contextmanager
+
+# taken as early as possible: run_async_engine imports this module first
+PROCESS_START = time.perf_counter()
+
+# leaves first, so each entry is charged only for what it adds on top of the previous ones
+SUBSYSTEM_MODULES = (
+    "logging_config",
+    "config_manager",
+    "metrics_manager",
+    "db_manager",
+    "data_pool",
+    "advanced_cluster_manager",
+    "engine",
+    "engine_manager",
+)
+
+class StartupProfile:
+    """
+    Startup breakdown: time spent importing and initializing each subsystem,
+    and time from process start to the first completed cycle of each engine.
+    """
+
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.phases = []
+        self.engines = {}
+
+    @contextmanager
+    def phase(self, name, kind="init"):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({"name": name, "kind": kind, "seconds": time.perf_counter() - begin})
+
+    def import_module(self, name):
+        cached = name in sys.modules
+        with self.phase(name, "import"):
+            module = importlib.import_module(name)
+        self.phases[-1]["cached"] = cached
+        return module
+
+    def watch_engine(self, engine_id, engine):
+        self.engines[engine_id] = engine
+
+    def report(self):
+        engines = {}
+        for engine_id, engine in list(self.engines.items()):
+            first = getattr(engine, "first_cycle_at", None)
+            engines[engine_id] = {"time_to_first_cycle": first - self.start if first is not None else None}
+        return {
+            "uptime": time.perf_counter() - self.start,
+            "import_seconds": sum(p["seconds"] for p in self.phases if p["kind"] == "import"),
+            "init_seconds": sum(p["seconds"] for p in self.phases if p["kind"] == "init"),
+            "phases": list(self.phases),
+            "engines": engines,
+        }
+
+    def log_report(self):
+        from logging_config import logger
+        report = self.report()
+        for p in report["phases"]:
+            logger.info("Startup %s %s: %.1f ms%s", p["kind"], p["name"], p["seconds"] * 1000,
+                        " (già importato)" if p.get("cached") else "")
+        for engine_id, info in report["engines"].items():
+            if info["time_to_first_cycle"] is not None:
+                logger.info("Startup engine %s: primo ciclo completato dopo %.1f ms",
+                            engine_id, info["time_to_first_cycle"] * 1000)
+        return report
+
+startup_profile = StartupProfile(start=PROCESS_START)
+
+def bootstrap(profile=None, metrics_server=True, instrument_asyncio=True, connect_cluster=False, migrate_db=True,
+              own_data_pool=True):
+    """
+    Explicitly bring up the process-wide subsystems that used to start as
+    import side effects, timing each step in the startup profile.
+
+    Importing the modules is cheap now: the metrics HTTP server, asyncio
+    instrumentation, the Kafka connection and the migrations of the shared
+    database only run here (or on first use). The supervisor process also
+    takes ownership of the shared DataPool segment, if configured.
+    """
+    profile = profile or startup_profile
+    for name in SUBSYSTEM_MODULES:
+        profile.import_module(name)
+    from logging_config import logger
+    if metrics_server:
+        from metrics_manager import metrics_manager
+        with profile.phase("metrics_http_server"):
+            try:
+                metrics_manager.start_http_server()
+            except OSError as e:
+                logger.error("Impossibile avviare l'endpoint delle metriche: %s", e)
+    if migrate_db:
+        from config_manager import config_manager
+        from db_manager import database_service
+        # a shared database is created and migrated once here; per-engine SQLite files on first use
+        if config_manager.get("db_url"):
+            with profile.phase("db_migrations"):
+                database_service.migrate()
+    if own_data_pool:
+        from data_pool import data_pool, SharedDataPool
+        if isinstance(data_pool, SharedDataPool):
+            data_pool.take_ownership()
+    from cpu_placement import pin_housekeeping_thread
+    from logging_config import log_listener
+    listener_thread = getattr(log_listener, "_thread", None)
+    if listener_thread is not None:
+        with profile.phase("cpu_placement"):
+            pin_housekeeping_thread("log-listener", listener_thread.native_id)
+    if instrument_asyncio:
+        with profile.phase("asyncio_instrumentation"):
+            try:
+                from opentelemetry.instrumentation.asyncio import AsyncInstrumentor
+                AsyncInstrumentor().instrument()
+            except ImportError:
+                logger.warning("opentelemetry-instrumentation-asyncio non installato, strumentazione saltata")
+    if connect_cluster:
+        from advanced_cluster_manager import advanced_cluster_manager
+        with profile.phase("cluster_connect"):
+            # starts the connection in the background; broadcasts fall back to the log until it is up
+            advanced_cluster_manager.ensure_producer()
+    return profile
@@ -0,0 +1,149 @@
+import threading
+import time
+from logging_config import logger
+from metrics_manager import metrics_manager
+
+class StatePersister:
+    """
+    Write-behind persistence stage for block states.
+
+    Blocks only mark their latest state as dirty; a background thread merges
+    the pending states per block and writes them with DBManager.save_states
+    in a single transaction every ``flush_interval`` seconds.
+    """
+
+    def __init__(self, db, flush_interval=0.1):
+        self.db = db
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self.running = False
+        self.thread = None
+        self.trace = None
+        self.written = 0
+        self.flushes = 0
+
+    @property
+    def queue_depth(self):
+        return len(self._pending)
+
+    def mark_dirty(self, block_name, state):
+        """Record the latest state of a block; older pending states are superseded."""
+        with self._lock:
+            self._pending[block_name] = state
+
+    def discard(self, block_name):
+        """Drop a pending state, e.g. for a block removed by a logic reload."""
+        with self._lock:
+            self._pending.pop(block_name, None)
+
+    def flush(self):
+        """Write all pending states in one batch. Returns the number of states written."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            metrics_manager.record_metric("state_persistence_queue_depth", len(pending))
+            if not pending:
+                return 0
+            start = time.time()
+            start_ns = time.perf_counter_ns()
+            saved = self.db.save_states(pending)
+            if self.trace:
+                self.trace.span("state_flush", start_ns, time.perf_counter_ns(), "persistence")
+            metrics_manager.observe_histogram("state_persistence_flush_latency_seconds", time.time() - start)
+            if not saved:
+                # Re-queue the batch unless a newer state arrived in the meantime
+                with self._lock:
+                    for block_name, state in pending.items():
+                        self._pending.setdefault(block_name, state)
+                metrics_manager.increment_counter("state_persistence_flush_failures_total")
+                return 0
+            metrics_manager.increment_counter("state_persistence_written_total", len(pending))
+            self.written += len(pending)
+            self.flushes += 1
+            return len(pending)
+
+    def _run(self):
+        from cpu_placement import pin_housekeeping_thread
+        pin_housekeeping_thread("state-persister")
+        while self.running:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Errore nel flush degli stati: %s", e)
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        logger.info("StatePersister avviato (intervallo %.3fs).", self.flush_interval)
+
+    def stop(self):
+        """Stop the flusher thread and write whatever is still pending."""
+        self.running = False
+        self._wakeup.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        self.flush()
+        logger.info("StatePersister fermato.")
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return frozenset((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    # keep True, 1 and 1.0 apart: they are equal in Python but serialize differently
+    if isinstance(value, (bool, float)):
+        return (type(value), value)
+    return value
+
+def freeze_state(state):
+    """Hashable, exactly comparable copy of a JSON-like state, built without serializing it."""
+    frozen = _freeze(state)
+    try:
+        hash(frozen)
+    except TypeError:
+        return repr(state)
+    return frozen
+
+def state_fingerprint(state):
+    """Hash of a state; equal hashes do not imply equal states, compare ``freeze_state`` results."""
+    return hash(freeze_state(state))
+
+class StateChangeTracker:
+    """
+    Remembers the last persisted state of each block (frozen, with its hash
+    as a fast pre-check) so unchanged states are neither serialized nor
+    written again, while a hash collision never hides a real change.
+    """
+
+    def __init__(self):
+        self._fingerprints = {}
+        self.changed = 0
+        self.suppressed = 0
+
+    def has_changed(self, block_name, state):
+        frozen = freeze_state(state)
+        fingerprint = (hash(frozen), frozen)
+        previous = self._fingerprints.get(block_name)
+        if previous is not None and previous[0] == fingerprint[0] and previous[1] == frozen:
+            self.suppressed += 1
+            return False
+        self._fingerprints[block_name] = fingerprint
+        self.changed += 1
+        return True
+
+    def remember(self, block_name, state):
+        """Seed the tracker with a state that is already persisted."""
+        frozen = freeze_state(state)
+        self._fingerprints[block_name] = (hash(frozen), frozen)
+
+    def forget(self, block_name):
+        self._fingerprints.pop(block_name, None)
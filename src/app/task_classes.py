@@ -0,0 +1,105 @@
+import math
+from prometheus_client import Counter, Histogram
+from logging_config import logger
+from execution_plan import ExecutionPlan, build_execution_plan
+
+task_class_duration_histogram = Histogram('engine_task_class_duration_seconds', 'Durata di esecuzione per classe di task',
+                                          ['engine', 'task_class'])
+task_class_overrun_counter = Counter('engine_task_class_overruns_total', 'Esecuzioni di una classe di task oltre il periodo',
+                                     ['engine', 'task_class'])
+
+DEFAULT_TASK_CLASS = "default"
+
+class TaskClass:
+    """A group of blocks sharing a period (a multiple of the engine tick) and a priority."""
+
+    def __init__(self, name, period, priority=0, ticks=1, timeout=None, engine_id="engine"):
+        self.name = name
+        self.period = period
+        self.priority = priority
+        self.ticks = ticks
+        self.timeout = timeout
+        self.offset = 0
+        self.overruns = 0
+        self.last_duration = None
+        self.plan = ExecutionPlan()
+        self._duration = task_class_duration_histogram.labels(engine=engine_id, task_class=name)
+        self._overrun = task_class_overrun_counter.labels(engine=engine_id, task_class=name)
+
+    def is_due(self, tick):
+        return (tick - self.offset) % self.ticks == 0
+
+    def record(self, duration):
+        self.last_duration = duration
+        self._duration.observe(duration)
+        if duration > self.period:
+            self.overruns += 1
+            self._overrun.inc()
+
+def assign_phase_offsets(task_classes):
+    """
+    Give each class the phase offset that least overlaps the classes placed
+    before it. Two classes fire together on a fraction 1/lcm of the ticks,
+    and only if their offsets agree modulo gcd of their periods.
+    """
+    placed = []
+    for task_class in sorted(task_classes, key=lambda c: (c.ticks, c.priority)):
+        best_offset, best_load = 0, None
+        for candidate in range(task_class.ticks):
+            load = 0.0
+            for other in placed:
+                common = math.gcd(task_class.ticks, other.ticks)
+                if (candidate - other.offset) % common == 0:
+                    load += common / (task_class.ticks * other.ticks)
+            if best_load is None or load < best_load:
+                best_offset, best_load = candidate, load
+        task_class.offset = best_offset
+        placed.append(task_class)
+
+class TaskClassScheduler:
+    """
+    PLC-style task classes multiplexed on the engine tick.
+
+    ``classes_config`` maps class names to ``{"period": seconds, "priority": n,
+    "timeout": seconds}``; periods are rounded to a multiple of the tick.
+    Blocks choose their class with a ``task_class`` attribute or the
+    ``assignments`` mapping and fall back to the ``default`` class, which runs
+    every tick. Due classes run in priority order, lowest value first.
+    """
+
+    def __init__(self, tick, classes_config=None, assignments=None, default_timeout=None, engine_id="engine"):
+        self.tick = tick
+        self.assignments = dict(assignments or {})
+        self.classes = {DEFAULT_TASK_CLASS: TaskClass(DEFAULT_TASK_CLASS, tick, timeout=default_timeout, engine_id=engine_id)}
+        for name, spec in (classes_config or {}).items():
+            period = float(spec.get("period", tick))
+            ticks = max(1, round(period / tick))
+            if not math.isclose(ticks * tick, period, rel_tol=1e-6):
+                logger.warning("Periodo %.6fs della classe %s arrotondato a %d tick.", period, name, ticks)
+            self.classes[name] = TaskClass(
+                name, ticks * tick,
+                priority=spec.get("priority", 0),
+                ticks=ticks,
+                timeout=spec.get("timeout", default_timeout),
+                engine_id=engine_id,
+            )
+        assign_phase_offsets(self.classes.values())
+        self._ordered = sorted(self.classes.values(), key=lambda c: c.priority)
+
+    def class_of(self, name, block):
+        class_name = self.assignments.get(name) or getattr(block, "task_class", None) or DEFAULT_TASK_CLASS
+        if class_name not in self.classes:
+            logger.warning("Classe di task %s del blocco %s non definita, uso %s.", class_name, name, DEFAULT_TASK_CLASS)
+            return DEFAULT_TASK_CLASS
+        return class_name
+
+    def rebuild(self, blocks):
+        """Distribute blocks over their classes and rebuild each class plan."""
+        grouped = {name: {} for name in self.classes}
+        for name, block in blocks.items():
+            grouped[self.class_of(name, block)][name] = block
+        for class_name, class_blocks in grouped.items():
+            self.classes[class_name].plan = build_execution_plan(class_blocks)
+
+    def due(self, tick):
+        return [c for c in self._ordered if c.plan.stages and c.is_due(tick)]
@@ -0,0 +1,15 @@
+from app.benchmark import compare_results, percentile
+
+def test_percentile_nearest_rank():
+    samples = sorted(range(1, 101))
+    assert percentile(samples, 0.5) == 51
+    assert percentile(samples, 0.99) == 100
+    assert percentile([], 0.5) == 0.0
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    baseline = {"cycle_time_p99": 0.010, "cycles_per_second": 200.0, "db_writes_per_second": 1000.0}
+    current = {"cycle_time_p99": 0.0105, "cycles_per_second": 150.0, "db_writes_per_second": 1500.0}
+    regressions = compare_results(current, baseline, threshold=0.1)
+    assert [r["metric"] for r in regressions] == ["cycles_per_second"]
+    assert regressions[0]["change"] == -0.25
+    assert compare_results(current, baseline, threshold=0.3) == []
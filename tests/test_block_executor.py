@@ -0,0 +1,38 @@
+from app.block_executor import BlockExecutionPolicy, INLINE, THREAD, timed_execute
+
+class SyncBlock:
+    execution_mode = None
+
+    def execute(self):
+        pass
+
+def test_fast_blocks_move_inline_after_warmup():
+    policy = BlockExecutionPolicy(inline_threshold=0.001, warmup=3)
+    block = SyncBlock()
+    for _ in range(2):
+        policy.record("fast", 0.00001)
+    assert policy.mode("fast", block) == THREAD
+    policy.record("fast", 0.00001)
+    assert policy.mode("fast", block) == INLINE
+
+def test_slow_inline_block_goes_back_to_thread():
+    policy = BlockExecutionPolicy(inline_threshold=0.001, warmup=1, alpha=1.0)
+    block = SyncBlock()
+    policy.record("blk", 0.0001)
+    assert policy.mode("blk", block) == INLINE
+    policy.record("blk", 0.0015)
+    assert policy.mode("blk", block) == INLINE
+    policy.record("blk", 0.01)
+    assert policy.mode("blk", block) == THREAD
+
+def test_overrides_are_not_reclassified():
+    policy = BlockExecutionPolicy(inline_threshold=0.001, warmup=1, overrides={"pinned": THREAD})
+    block = SyncBlock()
+    block.execution_mode = INLINE
+    policy.record("pinned", 0.0)
+    policy.record("attr", 1.0)
+    assert policy.mode("pinned", block) == THREAD
+    assert policy.mode("attr", block) == INLINE
+
+def test_timed_execute_measures_block():
+    assert timed_execute(SyncBlock()) >= 0
@@ -0,0 +1,40 @@
+import pytest
+from app.block_watchdog import BlockWatchdog
+
+class Block:
+    budget = None
+
+    def execute(self):
+        pass
+
+def test_budget_precedence():
+    watchdog = BlockWatchdog(budgets={"configured": 0.5})
+    block = Block()
+    block.budget = 0.2
+    watchdog.set_budget("configured", block, default=0.1)
+    watchdog.set_budget("attribute", block, default=0.1)
+    watchdog.set_budget("default", Block(), default=0.1)
+    assert watchdog.budget_of("configured") == 0.5
+    assert watchdog.budget_of("attribute") == 0.2
+    assert watchdog.budget_of("default") == 0.1
+
+def test_repeated_overruns_quarantine_only_the_offender():
+    watchdog = BlockWatchdog(max_overruns=2, quarantine_cycles=10)
+    watchdog.set_budget("slow", Block(), default=0.001)
+    watchdog.set_budget("fast", Block(), default=0.001)
+    watchdog.record("slow", 0.002, tick=1)
+    watchdog.record("fast", 0.0001, tick=1)
+    assert not watchdog.is_quarantined("slow", 2)
+    watchdog.record_timeout("slow", tick=2)
+    assert watchdog.is_quarantined("slow", 3)
+    assert not watchdog.is_quarantined("fast", 3)
+    assert not watchdog.is_quarantined("slow", 12)
+
+def test_usage_percentiles():
+    watchdog = BlockWatchdog()
+    watchdog.set_budget("blk", Block(), default=0.01)
+    for i in range(1, 101):
+        watchdog.record("blk", 0.0001 * i, tick=i)
+    report = watchdog.report()["blk"]
+    assert report["usage"]["p50"] == pytest.approx(0.51)
+    assert report["overruns"] == 0
@@ -0,0 +1,35 @@
+import os
+import pytest
+from app import cpu_placement
+from app.cpu_placement import apply_placement, parse_cpus, worker_spec
+
+def test_parse_cpus():
+    assert parse_cpus("0-2, 5") == {0, 1, 2, 5}
+    assert parse_cpus([3, 4]) == {3, 4}
+    assert parse_cpus(7) == {7}
+    assert parse_cpus(None) is None
+
+def test_workers_get_engine_loop_cpus_round_robin(monkeypatch):
+    config = {"engine_loop": {"cpus": "2-3", "policy": "fifo"}, "workers": {"1": {"cpus": "6"}}}
+    monkeypatch.setattr(cpu_placement, "placement_config", lambda: config)
+    assert worker_spec(0) == {"cpus": [2], "policy": "fifo"}
+    assert worker_spec(1) == {"cpus": "6"}
+    assert worker_spec(2) == {"cpus": [2], "policy": "fifo"}
+
+@pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="affinità CPU solo su Linux")
+def test_apply_placement_reports_what_was_applied():
+    current = os.sched_getaffinity(0)
+    applied = apply_placement("test-thread", {"cpus": sorted(current), "policy": "bogus"})
+    assert applied == {"cpus": sorted(current)}
+    assert cpu_placement.applied_placements["test-thread"] == applied
+
+def test_housekeeping_leaves_the_engine_loop_placement(monkeypatch):
+    monkeypatch.setattr(cpu_placement, "placement_config", lambda: {"engine_loop": {"cpus": "2", "policy": "fifo"}})
+    spec = cpu_placement.housekeeping_spec()
+    assert spec["policy"] == "other"
+    assert spec["cpus"] == cpu_placement._initial_cpus
+    housekeeping = {"cpus": "0-1", "nice": 5}
+    monkeypatch.setattr(cpu_placement, "placement_config", lambda: {"engine_loop": {"cpus": "2"}, "housekeeping": housekeeping})
+    assert cpu_placement.housekeeping_spec() == {"cpus": "0-1", "nice": 5, "policy": "other"}
+    monkeypatch.setattr(cpu_placement, "placement_config", lambda: {"housekeeping": housekeeping})
+    assert cpu_placement.housekeeping_spec() is housekeeping
@@ -0,0 +1,47 @@
+import time
+import pytest
+from app.cycle_scheduler import DeadlineScheduler
+
+@pytest.mark.asyncio
+async def test_deadlines_do_not_drift():
+    scheduler = DeadlineScheduler(0.01, engine_id="test")
+    await scheduler.wait_for_next_cycle(None, 0.0)
+    first = scheduler._deadline
+    for _ in range(5):
+        await scheduler.wait_for_next_cycle(None, 0.0)
+    assert scheduler._deadline == pytest.approx(first + 5 * 0.01)
+    assert scheduler.overruns == 0
+
+@pytest.mark.asyncio
+async def test_skip_policy_keeps_phase():
+    scheduler = DeadlineScheduler(0.01, overrun_policy="skip", engine_id="test")
+    scheduler._deadline = time.monotonic() - 0.025
+    anchor = scheduler._deadline
+    await scheduler.wait_for_next_cycle(None, 0.0)
+    assert scheduler.skipped == 3
+    assert scheduler._deadline == pytest.approx(anchor + 4 * 0.01)
+
+@pytest.mark.asyncio
+async def test_catch_up_and_shift_do_not_wait():
+    for policy in ("catch_up", "shift"):
+        scheduler = DeadlineScheduler(0.05, overrun_policy=policy, engine_id="test")
+        scheduler._deadline = time.monotonic() - 0.12
+        start = time.monotonic()
+        await scheduler.wait_for_next_cycle(None, 0.0)
+        assert time.monotonic() - start < 0.01
+        assert scheduler.overruns == 1
+
+def test_invalid_policy():
+    with pytest.raises(ValueError):
+        DeadlineScheduler(0.01, overrun_policy="later")
+
+@pytest.mark.asyncio
+async def test_catch_up_and_shift_still_yield_to_the_loop():
+    import asyncio
+    for policy in ("catch_up", "shift"):
+        scheduler = DeadlineScheduler(0.05, overrun_policy=policy, engine_id="test")
+        scheduler._deadline = time.monotonic() - 0.12
+        ran = []
+        asyncio.get_running_loop().call_soon(ran.append, policy)
+        await scheduler.wait_for_next_cycle(None, 0.0)
+        assert ran == [policy]
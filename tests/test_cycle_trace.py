@@ -0,0 +1,22 @@
+import json
+from app.cycle_trace import CycleTraceRecorder
+
+def test_ring_buffer_keeps_last_cycles():
+    recorder = CycleTraceRecorder(capacity=2)
+    for tick in range(3):
+        recorder.begin_cycle(tick)
+        recorder.span("cycle", tick * 1000, tick * 1000 + 500)
+    spans = [e for e in recorder.export()["traceEvents"] if e["ph"] == "X"]
+    assert [e["args"]["cycle"] for e in spans] == [1, 2]
+
+def test_blocks_get_their_own_lane(tmp_path):
+    recorder = CycleTraceRecorder(engine_id="eng1")
+    recorder.begin_cycle(0)
+    recorder.span("block_a", 0, 2000, "block", recorder.block_lane("block_a"))
+    recorder.span("block_b", 500, 1500, "block", recorder.block_lane("block_b"))
+    trace = recorder.export(last_n=1)
+    spans = {e["name"]: e for e in trace["traceEvents"] if e["ph"] == "X"}
+    assert spans["block_a"]["tid"] != spans["block_b"]["tid"]
+    assert spans["block_b"]["ts"] == 0.5 and spans["block_b"]["dur"] == 1.0
+    path = recorder.dump(str(tmp_path / "trace.json"))
+    assert json.load(open(path))["traceEvents"]
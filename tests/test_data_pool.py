@@ -0,0 +1,162 @@
+import os
+import pytest
+from app.data_pool import DataPool, SharedDataPool, QUALITY_GOOD, QUALITY_UNSET, QUALITY_BAD
+
+def test_handles_give_typed_access():
+    pool = DataPool()
+    speed = pool.register_variable("speed", 0, data_type="float")
+    count = pool.register_variable("count", 1, data_type="int", initial_value=3)
+    assert pool.get(speed) is None
+    assert pool.quality(speed) == QUALITY_UNSET
+    pool.set(speed, 1.5)
+    assert pool.get(speed) == 1.5
+    assert pool.quality(speed) == QUALITY_GOOD
+    assert pool.get_variable("count") == 3
+    with pytest.raises(TypeError, match="count"):
+        pool.set(count, 2.5)
+    assert pool.register_variable("speed", 0, data_type="float") == speed
+
+def test_bulk_access_and_name_layer():
+    pool = DataPool()
+    handles = [pool.register_variable(f"v{i}", i, data_type="float") for i in range(4)]
+    pool.set_many(handles, [0.0, 1.0, 2.0, 3.0], timestamp=10.0)
+    assert pool.get_many(handles[::-1]) == [3.0, 2.0, 1.0, 0.0]
+    assert pool.timestamp(handles[2]) == 10.0
+    pool.set(handles[0], 9.0, quality=QUALITY_BAD)
+    assert pool.get_all_variables()["v0"]["quality"] == QUALITY_BAD
+    pool.update_variable("v1", 7.0)
+    assert pool.get(handles[1]) == 7.0
+    assert pool.get_contiguous_groups() == [["v0", "v1", "v2", "v3"]]
+    with pytest.raises(KeyError):
+        pool.get_variable("missing")
+
+def test_default_variables_hold_any_value():
+    pool = DataPool()
+    registers = pool.register_variable("registers", 0, length=3)
+    flag = pool.register_variable("flag", 3, data_type="bool", initial_value=True)
+    for value in ([1, 2, 3], None, 2.5, "7"):
+        pool.set(registers, value)
+        assert pool.get(registers) == value
+    pool.update_variable("registers", [4, 5, 6])
+    assert pool.get_variable("registers") == [4, 5, 6]
+    assert pool.get(flag) is True
+    # multi-register variables never use scalar storage
+    words = pool.register_variable("words", 4, length=2, data_type="word", initial_value=[1, 2])
+    assert pool.get(words) == [1, 2]
+
+def test_object_types_fall_back_to_lists():
+    pool = DataPool()
+    handle = pool.register_variable("label", 0, data_type="string", initial_value="ok")
+    assert pool.get(handle) == "ok"
+    assert pool.get_all_variables()["label"]["type"] == "string"
+
+def test_shared_pool_is_visible_to_attached_pools():
+    tags = [{"name": "speed", "address": 0}, {"name": "count", "address": 1, "data_type": "int"}]
+    owner = SharedDataPool.create(f"vtest_{os.getpid()}", tags)
+    try:
+        reader = SharedDataPool.attach(owner.shm.name)
+        owner.update_variable("speed", 2.5)
+        owner.set(owner.handle_of("count"), 7, timestamp=5.0)
+        assert reader.get_variable("speed") == 2.5
+        assert reader.read(reader.handle_of("count")) == (7, 5.0, QUALITY_GOOD)
+        assert reader.get_many([1, 0]) == [7, 2.5]
+        with pytest.raises(KeyError):
+            reader.register_variable("missing", 2)
+        reader.close()
+    finally:
+        owner.close()
+
+def test_subscriptions_coalesce_and_apply_the_deadband():
+    pool = DataPool()
+    temp = pool.register_variable("line1.temp", 0, data_type="float", initial_value=20.0)
+    notified = []
+    pool.subscribe("line1.*", notified.append, deadband=0.5)
+    assert pool.dispatch_changes() == 1
+    for step in range(10):
+        pool.set(temp, 20.0 + step * 0.01)
+    pool.dispatch_changes()
+    assert notified == [{"line1.temp": 20.0}]
+    pool.set(temp, 21.0)
+    pool.set(temp, 22.0)
+    pool.register_variable("line1.speed", 1, data_type="float", initial_value=3.0)
+    pool.register_variable("line2.speed", 2, data_type="float", initial_value=4.0)
+    pool.dispatch_changes()
+    assert notified[-1] == {"line1.temp": 22.0, "line1.speed": 3.0}
+    assert pool.dispatch_changes() == 0
+
+def test_percent_deadband():
+    pool = DataPool()
+    handle = pool.register_variable("flow", 0, data_type="float", initial_value=100.0)
+    notified = []
+    pool.subscribe(["flow"], notified.append, deadband=5, percent=True)
+    pool.dispatch_changes()
+    pool.set(handle, 104.0)
+    pool.dispatch_changes()
+    pool.set(handle, 106.0)
+    pool.dispatch_changes()
+    assert notified == [{"flow": 100.0}, {"flow": 106.0}]
+
+def test_address_index_serves_ranges_and_cached_groups():
+    pool = DataPool()
+    pool.register_variable("b", 10, length=2)
+    pool.register_variable("a", 0, length=4)
+    pool.register_variable("c", 12)
+    assert pool.variables_in_range(2, 11) == ["a", "b"]
+    assert pool.variables_in_range(4, 10) == []
+    groups = pool.get_contiguous_groups()
+    assert groups == [["a"], ["b", "c"]]
+    assert pool.get_contiguous_groups() is groups
+    pool.register_variable("gap", 4, length=6)
+    assert pool.get_contiguous_groups() == [["a", "gap", "b", "c"]]
+    pool.register_variable("gap", 20)
+    assert pool.get_contiguous_groups() == [["a"], ["b", "c"], ["gap"]]
+
+def test_shared_segment_belongs_to_the_process_taking_ownership():
+    name = f"vtest_own_{os.getpid()}"
+    tags = [{"name": "speed", "address": 0}]
+    creator = SharedDataPool.open(name, tags)
+    assert not creator.owner
+    creator.close()
+    # the segment outlives the process that happened to create it
+    pool = SharedDataPool.attach(name)
+    pool.take_ownership()
+    assert pool.owner
+    pool.close()
+    with pytest.raises(FileNotFoundError):
+        SharedDataPool.attach(name)
+
+def test_dispatcher_notifies_without_an_engine():
+    import time
+    pool = DataPool(dispatch_interval=0.01)
+    handle = pool.register_variable("line2.speed", 0, data_type="float")
+    notified = []
+    pool.subscribe("line2.*", notified.append)
+    try:
+        pool.set(handle, 4.0)
+        for _ in range(100):
+            if notified:
+                break
+            time.sleep(0.01)
+        assert notified == [{"line2.speed": 4.0}]
+    finally:
+        pool.stop_dispatcher()
+    assert pool._dispatcher is None
+
+def test_requested_dispatch_runs_on_the_dispatcher_thread():
+    import threading
+    import time
+    pool = DataPool()
+    handle = pool.register_variable("line3.speed", 0, data_type="float")
+    notified = []
+    pool.subscribe("line3.*", lambda changes: notified.append((threading.current_thread().name, changes)))
+    assert pool._dispatcher is None
+    try:
+        pool.set(handle, 2.0)
+        pool.request_dispatch()
+        for _ in range(100):
+            if notified:
+                break
+            time.sleep(0.01)
+        assert notified == [("datapool-dispatch", {"line3.speed": 2.0})]
+    finally:
+        pool.stop_dispatcher()
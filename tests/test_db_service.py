@@ -0,0 +1,30 @@
+from app.db_manager import DBManager, database_service
+
+def test_managers_share_one_engine_per_url(tmp_path):
+    url = f"sqlite:///{tmp_path/'shared.db'}"
+    first = DBManager(db_url=url, namespace="eng1")
+    second = DBManager(db_url=url, namespace="eng2")
+    assert first.engine is second.engine
+    assert url in database_service._migrated
+
+def test_namespaces_isolate_block_states(tmp_path):
+    url = f"sqlite:///{tmp_path/'ns.db'}"
+    eng1 = DBManager(db_url=url, namespace="eng1")
+    eng2 = DBManager(db_url=url, namespace="eng2")
+    assert eng1.save_states({"pump": {"on": True}, "valve": {"open": 1}})
+    eng2.save_state("pump", {"on": False})
+    assert eng1.get_state("pump") == {"on": True}
+    assert eng2.get_state("pump") == {"on": False}
+    assert eng1.get_all_keys() == {"pump", "valve"}
+    eng2.delete_state("pump")
+    assert eng2.get_all_keys() == set()
+    assert eng1.get_all_keys() == {"pump", "valve"}
+
+def test_namespaced_manager_restores_states_saved_without_namespace(tmp_path):
+    url = f"sqlite:///{tmp_path/'legacy.db'}"
+    DBManager(db_url=url).save_state("pump", {"on": True})
+    eng1 = DBManager(db_url=url, namespace="eng1")
+    assert eng1.get_state("pump") == {"on": True}
+    eng1.save_state("pump", {"on": False})
+    assert eng1.get_state("pump") == {"on": False}
+    assert DBManager(db_url=url).get_all_keys() == {"pump", "eng1:pump"}
@@ -24,3 +24,219 @@ async def test_engine_runs_one_cycle(monkeypatch):
     engine.stop()
     await task
     # If no exceptions, test passes
+
+COUNTER_LOGIC = '''
+class Counter:
+    def __init__(self):
+        self.count = 0
+        self.paused = False
+    def execute(self):
+        self.count += 1
+    def on_pause(self):
+        self.paused = True
+    def on_resume(self):
+        self.paused = False
+    def get_state(self):
+        return {"count": self.count}
+    def set_state(self, state):
+        self.count = state.get("count", 0)
+
+logic_blocks = {"counter": Counter()}
+'''
+
+@pytest.mark.asyncio
+async def test_pause_parks_the_loop_and_keeps_state(tmp_path):
+    import asyncio
+    logic = tmp_path / "pause_logic.py"
+    logic.write_text(COUNTER_LOGIC)
+    engine = FastAsyncEngine(str(logic), cycle_time=0.005, db_path=str(tmp_path / "states.db"), engine_id="pause")
+    task = asyncio.create_task(engine.run())
+    await asyncio.sleep(0.1)
+    await engine.pause()
+    block = engine.blocks["counter"]
+    assert block.paused
+    assert engine.persister.thread is None
+    paused_at = engine.cycles
+    await asyncio.sleep(0.1)
+    assert engine.cycles <= paused_at + 1
+    await engine.resume()
+    await asyncio.sleep(0.05)
+    assert engine.cycles > paused_at + 1
+    assert engine.blocks["counter"] is block and not block.paused
+    await engine.stop()
+    await task
+
+SLOW_LOGIC = '''
+import asyncio
+
+class Slow:
+    def __init__(self):
+        self.in_cycle = False
+    async def execute(self):
+        self.in_cycle = True
+        try:
+            await asyncio.sleep(0.05)
+        finally:
+            self.in_cycle = False
+
+logic_blocks = {"slow": Slow()}
+'''
+
+@pytest.mark.asyncio
+async def test_pause_waits_for_the_current_cycle_and_pauses_drivers(tmp_path):
+    import asyncio
+    from app.io_manager import DriverManager
+    logic = tmp_path / "slow_logic.py"
+    logic.write_text(SLOW_LOGIC)
+    drivers = DriverManager()
+    engine = FastAsyncEngine(str(logic), cycle_time=0.001, db_path=str(tmp_path / "states.db"),
+                             engine_id="slow", execution_timeout=1.0, driver_manager=drivers)
+    task = asyncio.create_task(engine.run())
+    await asyncio.sleep(0.02)
+    await engine.pause()
+    assert not engine.blocks["slow"].in_cycle
+    assert drivers.paused
+    await engine.resume()
+    assert not drivers.paused
+    await engine.stop()
+    await task
+
+SLOW_COUNTER_LOGIC = '''
+import asyncio
+
+class SlowCounter:
+    def __init__(self):
+        self.count = 0
+    async def execute(self):
+        await asyncio.sleep(0.05)
+        self.count += 1
+    def get_state(self):
+        return {"count": self.count}
+    def set_state(self, state):
+        self.count = state.get("count", 0)
+
+logic_blocks = {"counter": SlowCounter()}
+'''
+
+@pytest.mark.asyncio
+async def test_stop_flushes_the_state_of_the_cycle_in_progress(tmp_path):
+    import asyncio
+    from app.db_manager import DBManager
+    logic = tmp_path / "slow_counter.py"
+    logic.write_text(SLOW_COUNTER_LOGIC)
+    db_path = str(tmp_path / "states.db")
+    engine = FastAsyncEngine(str(logic), cycle_time=0.001, db_path=db_path, engine_id="stop",
+                             execution_timeout=1.0)
+    task = asyncio.create_task(engine.run())
+    await asyncio.sleep(0.12)
+    await engine.stop()
+    await task
+    count = engine.blocks["counter"].count
+    assert count > 0
+    assert not engine.persister._pending
+    assert DBManager(db_path, namespace="stop").get_state("counter") == {"count": count}
+
+BUSY_LOGIC = '''
+import time
+
+class Busy:
+    execution_mode = "inline"
+    def execute(self):
+        end = time.perf_counter() + 0.00003
+        while time.perf_counter() < end:
+            pass
+
+logic_blocks = {f"busy_{i}": Busy() for i in range(60)}
+'''
+
+@pytest.mark.asyncio
+async def test_overrunning_inline_engine_yields_to_other_tasks(tmp_path):
+    import asyncio
+    from app.engine import DefaultScheduler
+    logic = tmp_path / "busy_logic.py"
+    logic.write_text(BUSY_LOGIC)
+    engine = FastAsyncEngine(str(logic), cycle_time=0.001, db_path=str(tmp_path / "states.db"), engine_id="busy",
+                             scheduler=DefaultScheduler(0.001, engine_id="busy"))
+
+    async def stopper():
+        await asyncio.sleep(0.05)
+        await engine.stop()
+
+    stop_task = asyncio.create_task(stopper())
+    # a starved loop would only return after all the cycles
+    await engine.run(max_cycles=2000)
+    await stop_task
+    assert engine.cycles < 2000
+
+@pytest.mark.asyncio
+async def test_resume_during_pause_cancels_it(tmp_path):
+    import asyncio
+    from app.io_manager import DriverManager
+    logic = tmp_path / "slow_logic.py"
+    logic.write_text(SLOW_LOGIC)
+    drivers = DriverManager()
+    engine = FastAsyncEngine(str(logic), cycle_time=0.001, db_path=str(tmp_path / "states.db"),
+                             engine_id="race", execution_timeout=1.0, driver_manager=drivers)
+    task = asyncio.create_task(engine.run())
+    await asyncio.sleep(0.02)
+    assert engine.blocks["slow"].in_cycle
+    pause = asyncio.create_task(engine.pause())
+    await asyncio.sleep(0)
+    await engine.resume()
+    await pause
+    assert not engine.paused
+    assert not drivers.paused
+    assert engine.persister.thread is not None
+    cycles = engine.cycles
+    await asyncio.sleep(0.12)
+    assert engine.cycles > cycles
+    await engine.stop()
+    await task
+
+@pytest.mark.asyncio
+async def test_engines_sharing_a_db_path_keep_their_own_states(tmp_path):
+    import asyncio
+    # one logic file each: the loader caches the module, blocks included, per file
+    first_logic = tmp_path / "first_logic.py"
+    second_logic = tmp_path / "second_logic.py"
+    first_logic.write_text(COUNTER_LOGIC)
+    second_logic.write_text(COUNTER_LOGIC)
+    db_path = str(tmp_path / "states.db")
+    first = FastAsyncEngine(str(first_logic), cycle_time=0.005, db_path=db_path, engine_id="first")
+    second = FastAsyncEngine(str(second_logic), cycle_time=0.005, db_path=db_path, engine_id="second")
+    first_task = asyncio.create_task(first.run())
+    await asyncio.sleep(0.1)
+    await first.stop()
+    await first_task
+    second_task = asyncio.create_task(second.run())
+    await asyncio.sleep(0.02)
+    await second.stop()
+    await second_task
+    from app.db_manager import DBManager
+    count = first.blocks["counter"].count
+    # the second engine did not restore the first one's counter
+    assert second.blocks["counter"].count < count
+    assert DBManager(db_path, namespace="first").get_state("counter") == {"count": count}
+    assert DBManager(db_path, namespace="second").get_state("counter") == {"count": second.blocks["counter"].count}
+
+@pytest.mark.asyncio
+async def test_subscribers_are_notified_off_the_engine_loop(tmp_path):
+    import asyncio
+    import threading
+    logic = tmp_path / "pause_logic.py"
+    logic.write_text(COUNTER_LOGIC)
+    engine = FastAsyncEngine(str(logic), cycle_time=0.005, db_path=str(tmp_path / "states.db"), engine_id="notify")
+    pool = engine.process_image.pool
+    handle = pool.register_variable("notify_test.value", 9000, data_type="int")
+    threads = []
+    subscription = pool.subscribe("notify_test.value", lambda changes: threads.append(threading.current_thread()))
+    task = asyncio.create_task(engine.run())
+    try:
+        pool.set(handle, 1)
+        await asyncio.sleep(0.1)
+        assert threads
+        assert threading.current_thread() not in threads
+    finally:
+        pool.unsubscribe(subscription)
+        await engine.stop()
+        await task
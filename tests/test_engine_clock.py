@@ -0,0 +1,34 @@
+import time
+import pytest
+from app.engine_clock import VirtualClock
+from app.cycle_scheduler import DeadlineScheduler
+from app.io_manager import ConfigurableMockDriver
+
+@pytest.mark.asyncio
+async def test_virtual_clock_runs_a_day_of_cycles_instantly():
+    clock = VirtualClock()
+    scheduler = DeadlineScheduler(1.0, engine_id="sim", clock=clock)
+    start = time.perf_counter()
+    for _ in range(86400):
+        await scheduler.wait_for_next_cycle(None, 0.0)
+    assert clock.monotonic() == pytest.approx(86400.0)
+    assert scheduler.overruns == 0
+    assert time.perf_counter() - start < 30
+
+@pytest.mark.asyncio
+async def test_seeded_mock_driver_is_reproducible():
+    async def outcomes(seed):
+        clock = VirtualClock()
+        driver = ConfigurableMockDriver(latency=0.01, error_rate=0.3, seed=seed, clock=clock)
+        results = []
+        for _ in range(50):
+            try:
+                results.append(await driver.read())
+            except Exception:
+                results.append(None)
+        return results, clock.monotonic()
+
+    assert await outcomes(7) == await outcomes(7)
+    results, elapsed = await outcomes(7)
+    assert None in results
+    assert 0.5 <= elapsed <= 1.0
@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from app.engine_manager import EngineManager
+
+def test_engines_are_placed_on_least_loaded_worker():
+    manager = EngineManager(workers=2)
+    assert manager.multiprocess
+    manager.placements["fast"] = {"worker": 0, "paused": False, "args": ("fast", "logic.py", 0.001, "a.db")}
+    assert manager._choose_worker().index == 1
+    manager.placements["slow"] = {"worker": 1, "paused": False, "args": ("slow", "logic.py", 0.1, "b.db")}
+    # 1000 cycles/s on worker 0 against 10 cycles/s on worker 1
+    assert manager._choose_worker().index == 1
+    assert not any(worker.started for worker in manager.workers)
+
+def test_in_process_mode_without_workers():
+    manager = EngineManager(workers=0)
+    assert not manager.multiprocess
+    assert manager.list_engines() == {}
+
+WORKER_LOGIC = '''
+class Counter:
+    def __init__(self):
+        self.count = 0
+    def execute(self):
+        self.count += 1
+    def get_state(self):
+        return {"count": self.count}
+    def set_state(self, state):
+        self.count = state.get("count", 0)
+
+logic_blocks = {"counter": Counter()}
+'''
+
+@pytest.mark.asyncio
+async def test_crashed_worker_is_restarted_with_its_engines(tmp_path):
+    logic = tmp_path / "worker_logic.py"
+    logic.write_text(WORKER_LOGIC)
+    manager = EngineManager(workers=1, start_method="spawn")
+    manager.supervise_interval = 0.1
+    worker = manager.workers[0]
+    try:
+        # concurrent first requests must share a single worker process
+        await asyncio.gather(
+            manager.add_engine("a", str(logic), 0.01, str(tmp_path / "a.db")),
+            manager.add_engine("b", str(logic), 0.01, str(tmp_path / "b.db")),
+        )
+        await manager.pause_engine("b")
+        assert worker.restarts == 0
+        assert set(worker.request("list_engines")) == {"a", "b"}
+        pid = worker.process.pid
+        worker.process.kill()
+        for _ in range(100):
+            await asyncio.sleep(0.1)
+            engines = manager.list_engines()
+            if worker.restarts and engines["a"]["running"] and engines["b"].get("paused"):
+                break
+        assert worker.process.pid != pid
+        assert engines["a"]["running"] and engines["a"]["worker"] == 0
+        assert engines["b"]["paused"]
+    finally:
+        await manager.shutdown()
+
+@pytest.mark.asyncio
+async def test_drivers_pause_only_with_every_engine(tmp_path):
+    from app.io_manager import BaseIODriver, DriverManager
+    class Field(BaseIODriver):
+        def read(self):
+            return {"value": 1}
+    logic = tmp_path / "logic.py"
+    logic.write_text(WORKER_LOGIC)
+    drivers = DriverManager()
+    drivers.register_driver(Field("field"))
+    manager = EngineManager(workers=0, pin_loop=False, driver_manager=drivers)
+    await manager.add_engine("a", str(logic), 0.005, str(tmp_path / "a.db"))
+    await manager.add_engine("b", str(logic), 0.005, str(tmp_path / "b.db"))
+    try:
+        await manager.pause_engine("a")
+        assert not drivers.paused
+        await manager.pause_engine("b")
+        assert drivers.paused
+        with pytest.raises(Exception, match="in pausa"):
+            await drivers.read_driver("field")
+        await manager.resume_engine("a")
+        assert not drivers.paused
+        assert await drivers.read_driver("field") == {"value": 1}
+    finally:
+        await manager.shutdown()
@@ -0,0 +1,40 @@
+from app.execution_plan import build_execution_plan
+
+class Block:
+    def __init__(self, reads=(), writes=()):
+        self.reads = reads
+        self.writes = writes
+
+    def execute(self):
+        pass
+
+def test_readers_run_after_writers():
+    blocks = {
+        "filter": Block(reads=["raw"], writes=["filtered"]),
+        "control": Block(reads=["filtered", "setpoint"], writes=["output"]),
+        "sensor": Block(writes=["raw"]),
+        "logger": Block(),
+    }
+    plan = build_execution_plan(blocks)
+    stages = [[name for name, _ in stage] for stage in plan.stages]
+    assert stages == [["sensor", "logger"], ["filter"], ["control"]]
+    assert len(plan) == 4
+
+def test_cycle_is_grouped_in_one_stage():
+    blocks = {
+        "a": Block(reads=["y"], writes=["x"]),
+        "b": Block(reads=["x"], writes=["y"]),
+        "c": Block(),
+    }
+    plan = build_execution_plan(blocks)
+    assert [[name for name, _ in stage] for stage in plan.stages] == [["c"], ["a", "b"]]
+
+def test_cycle_does_not_pull_in_its_consumers():
+    blocks = {
+        "a": Block(reads=["y"], writes=["x"]),
+        "b": Block(reads=["x"], writes=["y"]),
+        "c": Block(reads=["y"], writes=["z"]),
+        "d": Block(reads=["z"]),
+    }
+    plan = build_execution_plan(blocks)
+    assert [[name for name, _ in stage] for stage in plan.stages] == [["a", "b"], ["c"], ["d"]]
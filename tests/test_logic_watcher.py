@@ -0,0 +1,33 @@
+import time
+import pytest
+
+pytest.importorskip("watchdog")
+from app.logic_watcher import LogicWatcherService
+
+def test_engines_share_debounced_reload(tmp_path):
+    logic_file = tmp_path / "logic.py"
+    logic_file.write_text("logic_blocks = {}")
+    service = LogicWatcherService(debounce=0.05)
+    flag_a = service.watch(str(logic_file))
+    flag_b = service.watch(str(logic_file))
+    assert flag_a.is_set() and flag_b.is_set()
+    flag_a.clear()
+    flag_b.clear()
+    for _ in range(5):
+        service.notify(str(logic_file))
+    assert not flag_a.is_set()
+    time.sleep(0.2)
+    assert flag_a.is_set() and flag_b.is_set()
+    service.unwatch(str(logic_file), flag_a)
+    service.unwatch(str(logic_file), flag_b)
+    assert service._observer is None
+
+def test_missing_directory_falls_back_to_polling(tmp_path):
+    service = LogicWatcherService(debounce=0.05)
+    missing = tmp_path / "missing" / "logic.py"
+    flag = service.watch(str(missing))
+    # without a watch the flag is always set, so the engine checks the mtime every cycle
+    assert flag.is_set()
+    assert service._flags == {}
+    assert service._observer is None
+    service.unwatch(str(missing), flag)
@@ -0,0 +1,25 @@
+import threading
+from app.metrics_manager import ShardedHistogram, ShardedCounter
+
+def test_histogram_handle_aggregates_thread_shards():
+    histogram = ShardedHistogram("test_hot_latency_seconds", "test", ("engine", "block"), buckets=(0.001, 0.01))
+    handle = histogram.labels("eng1", "block1")
+    assert histogram.labels("eng1", "block1") is handle
+    handle.observe(0.0005)
+    worker = threading.Thread(target=lambda: [handle.observe(0.005) for _ in range(3)])
+    worker.start()
+    worker.join()
+    handle.observe(1.0)
+    counts, total = handle.snapshot()
+    assert counts == [1, 3, 1]
+    assert abs(total - 1.0155) < 1e-9
+    family = histogram.collect()
+    buckets = {s.labels["le"]: s.value for s in family.samples if s.name.endswith("_bucket")}
+    assert buckets == {"0.001": 1, "0.01": 4, "+Inf": 5}
+
+def test_counter_handle():
+    counter = ShardedCounter("test_hot_events_total", "test", ("engine",))
+    handle = counter.labels("eng1")
+    handle.inc()
+    handle.inc(4)
+    assert handle.value() == 5
@@ -0,0 +1,88 @@
+import pytest
+from app.data_pool import DataPool
+from app.process_executor import ProcessBlock
+from app.process_image import ProcessImage
+
+WORKER_LOGIC = '''
+class Accumulator:
+    reads = ("acc_step",)
+    writes = ("acc_total",)
+    def __init__(self):
+        self.total = 0
+    def execute(self, context):
+        self.total += context["acc_step"]
+        context["acc_total"] = self.total
+    def get_state(self):
+        return {"total": self.total}
+    def set_state(self, state):
+        self.total = state.get("total", 0)
+
+class Broken:
+    reads = ("acc_step",)
+    writes = ()
+    def execute(self):
+        raise ValueError("boom")
+
+logic_blocks = {"acc": Accumulator(), "broken": Broken()}
+'''
+
+def load_blocks(path):
+    namespace = {}
+    exec(path.read_text(), namespace)
+    return namespace["logic_blocks"]
+
+def make_pool():
+    pool = DataPool()
+    pool.register_variable("acc_step", 0, data_type="int", initial_value=2)
+    pool.register_variable("acc_total", 1, data_type="int")
+    return pool
+
+@pytest.mark.asyncio
+async def test_block_runs_in_worker_through_process_image(tmp_path):
+    logic = tmp_path / "worker_logic.py"
+    logic.write_text(WORKER_LOGIC)
+    pool = make_pool()
+    block = ProcessBlock("acc", load_blocks(logic)["acc"], str(logic), pool=pool)
+    try:
+        assert block.process.is_alive()
+        assert block.types == ("int", "int")
+        image = ProcessImage(pool)
+        image.set_inputs(block.reads)
+        for _ in range(2):
+            image.refresh()
+            await block.execute(image)
+            image.commit()
+        # the float64 slot is converted back to the declared int type
+        total = pool.get_variable("acc_total")
+        assert total == 4 and isinstance(total, int)
+        assert block.get_state() == {"total": 4}
+        block.set_state({"total": 10})
+        image.refresh()
+        await block.execute(image)
+        image.commit()
+        assert pool.get_variable("acc_total") == 12
+        assert block.get_state() == {"total": 12}
+    finally:
+        block.close()
+
+@pytest.mark.asyncio
+async def test_worker_error_is_raised_in_the_engine(tmp_path):
+    logic = tmp_path / "worker_logic.py"
+    logic.write_text(WORKER_LOGIC)
+    pool = make_pool()
+    block = ProcessBlock("broken", load_blocks(logic)["broken"], str(logic), pool=pool)
+    try:
+        with pytest.raises(RuntimeError, match="boom"):
+            await block.execute()
+        # the worker survives a failing run
+        assert block.process.is_alive()
+    finally:
+        block.close()
+
+def test_non_scalar_tags_are_rejected(tmp_path):
+    logic = tmp_path / "worker_logic.py"
+    logic.write_text(WORKER_LOGIC)
+    pool = DataPool()
+    pool.register_variable("acc_step", 0, initial_value=[1, 2])
+    with pytest.raises(ValueError, match="acc_step"):
+        ProcessBlock("acc", load_blocks(logic)["acc"], str(logic), pool=pool)
@@ -0,0 +1,56 @@
+import pytest
+from app.data_pool import DataPool
+from app.process_image import ProcessImage, takes_context
+
+def test_inputs_are_frozen_for_the_cycle_and_outputs_staged():
+    pool = DataPool()
+    pool.register_variable("level", 0, data_type="float", initial_value=1.0)
+    pool.register_variable("valve", 1, data_type="float")
+    committed = []
+    image = ProcessImage(pool)
+    image.set_inputs({"level"})
+    image.add_sink(committed.append)
+    image.refresh()
+    pool.update_variable("level", 2.0)
+    assert image["level"] == 1.0
+    image["valve"] = 0.5
+    assert image["valve"] == 0.5
+    assert pool.get_variable("valve") is None
+    assert image.commit() == {"valve": 0.5}
+    assert pool.get_variable("valve") == 0.5
+    assert committed == [{"valve": 0.5}]
+    image.refresh()
+    assert image["level"] == 2.0
+
+def test_takes_context():
+    class Legacy:
+        def execute(self):
+            pass
+    class WithContext:
+        async def execute(self, context):
+            pass
+    assert not takes_context(Legacy())
+    assert takes_context(WithContext())
+
+IMAGE_LOGIC = '''
+class Doubler:
+    reads = ("ptest_in",)
+    writes = ("ptest_out",)
+    def execute(self, context):
+        context["ptest_out"] = context["ptest_in"] * 2
+
+logic_blocks = {"doubler": Doubler()}
+'''
+
+@pytest.mark.asyncio
+async def test_engine_commits_block_outputs_at_cycle_end(tmp_path):
+    from app.engine import FastAsyncEngine
+    logic = tmp_path / "image_logic.py"
+    logic.write_text(IMAGE_LOGIC)
+    engine = FastAsyncEngine(str(logic), cycle_time=0.001, db_path=str(tmp_path / "states.db"), engine_id="image")
+    pool = engine.process_image.pool
+    pool.register_variable("ptest_in", 0, data_type="float", initial_value=3.0)
+    pool.register_variable("ptest_out", 1, data_type="float")
+    await engine.run(max_cycles=2)
+    await engine.stop()
+    assert pool.get_variable("ptest_out") == 6.0
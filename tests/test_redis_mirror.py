@@ -0,0 +1,84 @@
+from app.data_pool import DataPool
+from app.redis_mirror import RedisMirror, decode_tag
+
+class FakeRedis:
+    """In-memory stand-in for the pipelined HSET calls of the mirror."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.round_trips = 0
+        self.fail = False
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+class FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def hset(self, key, mapping):
+        self.commands.append((key, dict(mapping)))
+
+    def execute(self):
+        self.client.round_trips += 1
+        if self.client.fail:
+            raise ConnectionError("redis down")
+        for key, mapping in self.commands:
+            self.client.hashes.setdefault(key, {}).update(mapping)
+
+def test_mirror_coalesces_writes_into_pipelined_batches():
+    pool = DataPool()
+    client = FakeRedis()
+    pool.mirror = mirror = RedisMirror(pool, client, batch_size=2)
+    handles = [pool.register_variable(f"t{i}", i, data_type="float") for i in range(5)]
+    for step in range(100):
+        pool.set_many(handles, [float(step)] * 5, timestamp=1.0)
+    assert mirror.backlog == 5
+    assert mirror.flush() == 5
+    assert client.round_trips == 1
+    assert decode_tag(client.hashes["datapool"]["t3"]) == {"value": 99.0, "timestamp": 1.0, "quality": 3}
+    assert mirror.flush() == 0
+
+def test_failed_flush_is_requeued():
+    pool = DataPool()
+    client = FakeRedis()
+    pool.mirror = mirror = RedisMirror(pool, client)
+    handle = pool.register_variable("speed", 0, data_type="float", initial_value=1.0)
+    client.fail = True
+    assert mirror.flush() == 0
+    assert mirror.backlog == 1 and mirror.failures == 1
+    pool.set(handle, 2.0)
+    client.fail = False
+    assert mirror.flush() == 1
+    assert decode_tag(client.hashes["datapool"]["speed"])["value"] == 2.0
+
+def test_lag_keeps_growing_while_redis_is_down():
+    import time
+    pool = DataPool()
+    client = FakeRedis()
+    pool.mirror = mirror = RedisMirror(pool, client)
+    handle = pool.register_variable("speed", 0, data_type="float")
+    pool.set(handle, 1.0)
+    client.fail = True
+    mirror.flush()
+    first_lag = mirror.lag
+    time.sleep(0.02)
+    pool.set(handle, 2.0)
+    mirror.flush()
+    # measured from the first change that never reached Redis
+    assert mirror.lag >= first_lag + 0.02
+    client.fail = False
+    assert mirror.flush() == 1
+    assert mirror.lag >= 0.02
+    assert mirror.flush() == 0 and mirror.lag == 0.0
+
+def test_stop_flushes_pending_tags():
+    pool = DataPool()
+    client = FakeRedis()
+    pool.mirror = mirror = RedisMirror(pool, client, interval=60.0)
+    mirror.start()
+    pool.set(pool.register_variable("speed", 0, data_type="float"), 3.0)
+    mirror.stop()
+    assert mirror.thread is None
+    assert decode_tag(client.hashes["datapool"]["speed"])["value"] == 3.0
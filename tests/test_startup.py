@@ -0,0 +1,21 @@
+import time
+from app.startup import StartupProfile
+
+class _Engine:
+    first_cycle_at = None
+
+def test_profile_breaks_down_phases_and_first_cycle():
+    profile = StartupProfile()
+    profile.import_module("json")
+    with profile.phase("slow_init"):
+        time.sleep(0.01)
+    engine = _Engine()
+    profile.watch_engine("eng1", engine)
+    assert profile.report()["engines"]["eng1"]["time_to_first_cycle"] is None
+
+    engine.first_cycle_at = time.perf_counter()
+    report = profile.report()
+    assert [p["name"] for p in report["phases"]] == ["json", "slow_init"]
+    assert report["phases"][0]["kind"] == "import"
+    assert report["init_seconds"] >= 0.01
+    assert report["engines"]["eng1"]["time_to_first_cycle"] >= report["init_seconds"]
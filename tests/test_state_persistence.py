@@ -0,0 +1,55 @@
+from app.state_persistence import StatePersister, StateChangeTracker
+
+class FakeDB:
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+
+    def save_states(self, states):
+        if self.fail:
+            return False
+        self.batches.append(dict(states))
+        return True
+
+def test_flush_merges_latest_state_per_block():
+    db = FakeDB()
+    persister = StatePersister(db, flush_interval=60)
+    persister.mark_dirty("block1", {"counter": 1})
+    persister.mark_dirty("block1", {"counter": 2})
+    persister.mark_dirty("block2", {"counter": 7})
+    assert persister.queue_depth == 2
+    assert persister.flush() == 2
+    assert db.batches == [{"block1": {"counter": 2}, "block2": {"counter": 7}}]
+    assert persister.queue_depth == 0
+
+def test_failed_flush_requeues_batch():
+    db = FakeDB(fail=True)
+    persister = StatePersister(db, flush_interval=60)
+    persister.mark_dirty("block1", {"counter": 1})
+    assert persister.flush() == 0
+    assert persister.queue_depth == 1
+
+def test_stop_flushes_pending_states():
+    db = FakeDB()
+    persister = StatePersister(db, flush_interval=60)
+    persister.start()
+    persister.mark_dirty("block1", {"counter": 3})
+    persister.stop()
+    assert db.batches[-1] == {"block1": {"counter": 3}}
+
+def test_change_tracker_suppresses_identical_states():
+    tracker = StateChangeTracker()
+    assert tracker.has_changed("block1", {"counter": 1, "flags": [1, 2]})
+    assert not tracker.has_changed("block1", {"flags": [1, 2], "counter": 1})
+    assert tracker.has_changed("block1", {"counter": True, "flags": [1, 2]})
+    tracker.remember("block2", {"counter": 5})
+    assert not tracker.has_changed("block2", {"counter": 5})
+    assert (tracker.changed, tracker.suppressed) == (2, 2)
+
+def test_change_tracker_is_not_fooled_by_hash_collisions():
+    assert hash(-1) == hash(-2)
+    tracker = StateChangeTracker()
+    assert tracker.has_changed("block1", {"counter": -1})
+    assert tracker.has_changed("block1", {"counter": -2})
+    assert tracker.has_changed("block1", {"counter": 1})
+    assert tracker.has_changed("block1", {"counter": 1.0})
@@ -0,0 +1,35 @@
+from app.task_classes import TaskClassScheduler, DEFAULT_TASK_CLASS
+
+class Block:
+    def __init__(self, task_class=None):
+        self.task_class = task_class
+
+    def execute(self):
+        pass
+
+def test_blocks_run_at_their_class_rate():
+    scheduler = TaskClassScheduler(0.001, classes_config={"slow": {"period": 0.01, "priority": 5}})
+    scheduler.rebuild({"motion": Block(), "temperature": Block("slow")})
+    slow = scheduler.classes["slow"]
+    assert slow.ticks == 10
+    runs = [[c.name for c in scheduler.due(tick)] for tick in range(20)]
+    assert sum("slow" in names for names in runs) == 2
+    assert all(names[0] == DEFAULT_TASK_CLASS for names in runs)
+
+def test_phase_offsets_spread_equal_periods():
+    scheduler = TaskClassScheduler(0.001, classes_config={
+        "a": {"period": 0.004}, "b": {"period": 0.004}, "c": {"period": 0.004},
+    })
+    offsets = {scheduler.classes[name].offset for name in ("a", "b", "c")}
+    assert len(offsets) == 3
+
+def test_unknown_class_falls_back_to_default():
+    scheduler = TaskClassScheduler(0.001, assignments={"blk": "missing"})
+    assert scheduler.class_of("blk", Block()) == DEFAULT_TASK_CLASS
+
+def test_overrun_is_counted():
+    scheduler = TaskClassScheduler(0.001)
+    default = scheduler.classes[DEFAULT_TASK_CLASS]
+    default.record(0.0005)
+    default.record(0.002)
+    assert default.overruns == 1